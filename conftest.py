@@ -0,0 +1,12 @@
+import pytest
+
+
+@pytest.fixture(autouse=True, scope='session')
+def yatube_test_settings():
+    """Те же настройки, что у manage.py test (core.testing)."""
+    from django.test import override_settings
+
+    from core.testing import test_settings
+
+    with override_settings(**test_settings()):
+        yield
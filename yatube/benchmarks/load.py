@@ -0,0 +1,337 @@
+"""Нагрузочный бенчмарк WSGI-приложения yatube.
+
+Запуск из каталога yatube:
+
+    python -m benchmarks.load --scales 1000 10000 --requests 200 \\
+        --concurrency 4 --mode inprocess http --output bench.json
+
+Для каждого масштаба из benchmarks.seed поднимается своя база, после
+чего каждый маршрут из ROUTES обстреливается из пула потоков: либо
+прямыми вызовами WSGI-приложения (inprocess), либо через локальный
+HTTP-сервер wsgiref в соседнем потоке (http). В JSON пишутся
+пропускная способность и p50/p95/p99 по каждому маршруту; файл
+отсортирован и стабилен, его удобно сравнивать между коммитами.
+"""
+import argparse
+import http.client
+import io
+import json
+import math
+import os
+import platform
+import random
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from benchmarks import seed  # noqa: E402
+from posts.models import Group, Post  # noqa: E402
+
+User = get_user_model()
+
+WARMUP = 5
+
+
+class Route:
+    def __init__(self, name, method='GET', login=False, data=None,
+                 kwargs=None):
+        self.name = name
+        self.method = method
+        self.login = login
+        self.data = data
+        self.kwargs = kwargs or (lambda fixture, rng: {})
+
+    def path(self, fixture, rng):
+        return reverse(self.name, kwargs=self.kwargs(fixture, rng))
+
+
+ROUTES = (
+    Route('posts:index'),
+    Route('posts:group_list',
+          kwargs=lambda fixture, rng: {'slug': rng.choice(fixture['slugs'])}),
+    Route('posts:profile',
+          kwargs=lambda fixture, rng: {
+              'username': rng.choice(fixture['usernames'])
+          }),
+    Route('posts:post_detail',
+          kwargs=lambda fixture, rng: {
+              'post_id': rng.choice(fixture['post_ids'])
+          }),
+    Route('posts:follow_index', login=True),
+    Route('posts:post_create', method='POST', login=True,
+          data=lambda rng: {'text': f'Пост бенчмарка {rng.random()}'}),
+    Route('posts:add_comment', method='POST', login=True,
+          kwargs=lambda fixture, rng: {
+              'post_id': rng.choice(fixture['post_ids'])
+          },
+          data=lambda rng: {'text': f'Комментарий {rng.random()}'}),
+    Route('posts:profile_follow', login=True,
+          kwargs=lambda fixture, rng: {
+              'username': rng.choice(fixture['usernames'])
+          }),
+)
+
+
+def fixture_for_scale(scale):
+    rng = random.Random(scale)
+    post_ids = list(Post.objects.values_list('pk', flat=True)[:1000])
+    usernames = list(User.objects.values_list('username', flat=True)[:1000])
+    return {
+        'post_ids': post_ids,
+        'usernames': usernames,
+        'slugs': list(Group.objects.values_list('slug', flat=True)),
+        'user': User.objects.get(username=rng.choice(usernames)),
+    }
+
+
+def percentile(samples, fraction):
+    """Перцентиль методом ближайшего ранга по отсортированной выборке."""
+    if not samples:
+        return None
+    rank = max(1, math.ceil(fraction * len(samples)))
+    return samples[rank - 1]
+
+
+class InProcessDriver:
+    """Вызывает WSGI-приложение напрямую, без сети."""
+
+    def __init__(self, application):
+        self.application = application
+
+    def request(self, method, path, body=b'', headers=None):
+        path, _, query = path.partition('?')
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': '127.0.0.1',
+            'CONTENT_LENGTH': str(len(body)),
+            'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in (headers or {}).items():
+            environ['HTTP_' + name.upper().replace('-', '_')] = value
+        response = {}
+
+        def start_response(status, response_headers, exc_info=None):
+            response['status'] = int(status.split()[0])
+            response['headers'] = response_headers
+
+        result = self.application(environ, start_response)
+        try:
+            for _ in result:
+                pass
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return response['status'], response['headers']
+
+    def close(self):
+        pass
+
+
+class _ThreadingWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class HttpDriver:
+    """Гоняет запросы через локальный wsgiref-сервер в отдельном потоке."""
+
+    def __init__(self, application):
+        self.server = make_server(
+            '127.0.0.1', 0, application,
+            server_class=_ThreadingWSGIServer, handler_class=_QuietHandler,
+        )
+        self.port = self.server.server_port
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True
+        )
+        self.thread.start()
+
+    def request(self, method, path, body=b'', headers=None):
+        connection = http.client.HTTPConnection('127.0.0.1', self.port)
+        try:
+            headers = dict(headers or {})
+            if body:
+                headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            connection.request(method, path, body=body or None,
+                               headers=headers)
+            response = connection.getresponse()
+            response.read()
+            return response.status, response.getheaders()
+        finally:
+            connection.close()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class Session:
+    """Авторизованная сессия: cookie сессии и CSRF-токен."""
+
+    def __init__(self, driver, user):
+        client = Client()
+        client.force_login(user)
+        self.cookies = {
+            settings.SESSION_COOKIE_NAME:
+                client.cookies[settings.SESSION_COOKIE_NAME].value,
+        }
+        # CSRF-токен берём так же, как браузер: из Set-Cookie формы.
+        _, headers = driver.request(
+            'GET', reverse('posts:post_create'), headers=self.headers()
+        )
+        for name, value in headers:
+            if name.lower() == 'set-cookie':
+                for morsel in SimpleCookie(value).values():
+                    self.cookies[morsel.key] = morsel.value
+        self.csrf_token = self.cookies[settings.CSRF_COOKIE_NAME]
+
+    def headers(self):
+        return {'Cookie': '; '.join(
+            f'{name}={value}' for name, value in self.cookies.items()
+        )}
+
+
+def run_route(driver, route, fixture, session, requests, concurrency):
+    login_url = reverse(settings.LOGIN_URL)
+
+    def one(number):
+        rng = random.Random(number)
+        body = b''
+        headers = session.headers() if route.login else {}
+        if route.data:
+            body = urlencode({
+                **route.data(rng),
+                'csrfmiddlewaretoken': session.csrf_token,
+            }).encode()
+        started = time.perf_counter()
+        status, response_headers = driver.request(
+            route.method, route.path(fixture, rng), body, headers
+        )
+        elapsed = (time.perf_counter() - started) * 1000
+        # Редирект на вход означает, что сессия не сработала.
+        location = dict(
+            (name.lower(), value) for name, value in response_headers
+        ).get('location', '')
+        return elapsed, status < 400 and login_url not in location
+
+    for number in range(WARMUP):
+        one(-number - 1)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - started
+    latencies = sorted(latency for latency, _ in results)
+    return {
+        'requests': requests,
+        'errors': sum(1 for _, ok in results if not ok),
+        'rps': round(requests / wall, 1),
+        'mean_ms': round(sum(latencies) / len(latencies), 2),
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1000])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--mode', nargs='+', choices=('inprocess', 'http'),
+                        default=['inprocess', 'http'])
+    parser.add_argument('--routes', nargs='+',
+                        help='Имена маршрутов, например posts:index')
+    parser.add_argument('--fresh', action='store_true',
+                        help='Пересоздать базы масштабов')
+    parser.add_argument('--output', help='Файл для JSON (по умолчанию stdout)')
+    options = parser.parse_args()
+
+    routes = [route for route in ROUTES
+              if not options.routes or route.name in options.routes]
+    application = get_wsgi_application()
+    results = []
+    for scale in options.scales:
+        started = time.perf_counter()
+        seed.seed(scale, fresh=options.fresh)
+        print(f'масштаб {scale}: база готова за '
+              f'{time.perf_counter() - started:.1f} с', file=sys.stderr)
+        fixture = fixture_for_scale(scale)
+        for mode in options.mode:
+            driver = (HttpDriver if mode == 'http'
+                      else InProcessDriver)(application)
+            try:
+                session = Session(driver, fixture['user'])
+                for route in routes:
+                    result = run_route(driver, route, fixture, session,
+                                       options.requests, options.concurrency)
+                    result.update(scale=scale, mode=mode, route=route.name)
+                    results.append(result)
+                    print(f'{scale:>8} {mode:<10} {route.name:<22} '
+                          f'{result["rps"]:>8} rps  p50 {result["p50_ms"]} '
+                          f'p95 {result["p95_ms"]} p99 {result["p99_ms"]} '
+                          f'ошибок {result["errors"]}', file=sys.stderr)
+            finally:
+                driver.close()
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'requests': options.requests,
+            'concurrency': options.concurrency,
+        },
+        'results': results,
+    }
+    output = json.dumps(report, indent=2, sort_keys=True, ensure_ascii=False)
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
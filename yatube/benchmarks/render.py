@@ -0,0 +1,118 @@
+"""Время рендера страницы ленты: linebreaksbr на показ против готового HTML.
+
+Запуск из каталога yatube:
+
+    python -m benchmarks.render [--lengths 200 2000 20000] [--repeat 200]
+
+Рендерится includes/post_item.html для страницы из VIEW_COUNT постов
+без кеша фрагментов (так выглядит каждый промах кеша) в трёх вариантах:
+полный текст через linebreaksbr, анонс через linebreaksbr и текущий
+шаблон с готовым preview_html. База не нужна: посты создаются в памяти,
+HTML считается rendering.render(), как в Post.save().
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.template import engines  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from posts import rendering  # noqa: E402
+from posts.models import Post  # noqa: E402
+
+User = get_user_model()
+
+TEMPLATE = 'includes/post_item.html'
+WORDS = (
+    'кошка собака дом улица город река лес поле небо солнце дождь снег '
+    'ветер море берег мост дорога окно дверь стол книга письмо друг '
+    '<b> & "цитата"'
+).split()
+
+
+def templates():
+    engine = engines['django']
+    with open(engine.engine.find_template(TEMPLATE)[1].name,
+              encoding='utf-8') as file:
+        source = file.read()
+    # Кеш фрагментов убирается: меряется рендер при промахе.
+    source = re.sub(r'{% (end)?cache[^%]*%}', '', source)
+    variants = {
+        'text': '{{ post.text|linebreaksbr }}',
+        'preview': '{{ post.preview|linebreaksbr }}',
+        'preview_html': '{{ post.preview_html|safe }}',
+    }
+    return {
+        name: engine.from_string(
+            source.replace('{{ post.preview_html|safe }}', tag)
+        )
+        for name, tag in variants.items()
+    }
+
+
+def make_posts(length, rng):
+    author = User(pk=1, username='author')
+    posts = []
+    for number in range(1, settings.VIEW_COUNT + 1):
+        lines = []
+        size = 0
+        while size < length:
+            line = ' '.join(rng.choices(WORDS, k=rng.randint(5, 15)))
+            lines.append(line)
+            size += len(line) + 1
+        text = '\n'.join(lines)[:length]
+        post = Post(pk=number, text=text, author=author,
+                    pub_date=timezone.now(), updated_at=timezone.now(),
+                    **rendering.render(text))
+        posts.append(post)
+    return posts
+
+
+def render_page(template, posts):
+    return ''.join(
+        template.render({'post': post, 'following_ids': frozenset()})
+        for post in posts
+    )
+
+
+def timed(template, posts, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        render_page(template, posts)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lengths', type=int, nargs='+',
+                        default=[200, 2000, 20000])
+    parser.add_argument('--repeat', type=int, default=200)
+    options = parser.parse_args()
+    variants = templates()
+    rng = random.Random(0)
+    print(f'{"длина":<8}' + ''.join(f'{name + ", мс":>18}{"КБ":>8}'
+                                    for name in variants))
+    for length in options.lengths:
+        posts = make_posts(length, rng)
+        row = f'{length:<8}'
+        for template in variants.values():
+            size = len(render_page(template, posts)) / 1024
+            row += (f'{timed(template, posts, options.repeat):>18.2f}'
+                    f'{size:>8.1f}')
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Сравнение поиска через FTS5 с LIKE '%...%' на 100k и 1M постов.
+
+Запуск из каталога yatube:
+
+    python -m benchmarks.search [--sizes 100000 1000000] [--repeat 5]
+
+База создаётся во временном файле напрямую через sqlite3: таблица
+posts_post с колонкой text и ровно той же схемой индекса и триггерами,
+что ставит posts.search.install(). Тексты детерминированы (random.seed).
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+django.setup()
+
+from posts import search  # noqa: E402
+
+WORDS = (
+    'кошка собака дом улица город река лес поле небо солнце дождь снег '
+    'ветер море берег мост дорога окно дверь стол книга письмо друг '
+    'утро вечер ночь зима лето весна осень работа школа музыка'
+).split()
+RARE = 'аэростат'
+
+QUERIES = ('кошка', 'кошка собака', RARE)
+
+
+def make_text(rng, number):
+    words = rng.choices(WORDS, k=rng.randint(8, 40))
+    if number % 10000 == 0:
+        words.append(RARE)
+    return ' '.join(words)
+
+
+def build(path, size):
+    rng = random.Random(size)
+    db = sqlite3.connect(path)
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('CREATE TABLE posts_post (id INTEGER PRIMARY KEY, text TEXT)')
+    for statement in search.SCHEMA:
+        db.execute(statement)
+    db.executemany(
+        'INSERT INTO posts_post (id, text) VALUES (?, ?)',
+        ((number, make_text(rng, number)) for number in range(1, size + 1))
+    )
+    db.commit()
+    return db
+
+
+def timed(db, sql, params, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        db.execute(sql, params).fetchall()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def run(size, repeat):
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        db = build(os.path.join(directory, 'search.sqlite3'), size)
+        print(f'\n{size} постов, заполнение с индексом '
+              f'{time.perf_counter() - started:.1f} с')
+        print(f'{"запрос":<16}{"LIKE, мс":>12}{"FTS5, мс":>12}')
+        for query in QUERIES:
+            like = timed(
+                db,
+                'SELECT id FROM posts_post WHERE '
+                + ' AND '.join(['text LIKE ?'] * len(query.split()))
+                + ' ORDER BY id DESC LIMIT 10',
+                [f'%{word}%' for word in query.split()],
+                repeat,
+            )
+            fts = timed(
+                db,
+                f'SELECT rowid, bm25({search.TABLE}) AS score '
+                f'FROM {search.TABLE} WHERE {search.TABLE} MATCH ? '
+                f'ORDER BY score, rowid LIMIT 10',
+                [search.to_match(query)],
+                repeat,
+            )
+            print(f'{query:<16}{like:>12.1f}{fts:>12.1f}')
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=5)
+    options = parser.parse_args()
+    for size in options.sizes:
+        run(size, options.repeat)
+
+
+if __name__ == '__main__':
+    main()
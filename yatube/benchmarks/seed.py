@@ -0,0 +1,95 @@
+"""Детерминированные наборы данных для бенчмарков.
+
+Масштаб — число постов; пользователи, группы, комментарии и подписки
+выводятся из него. Генератор случайных чисел инициализируется масштабом,
+поэтому один и тот же масштаб всегда даёт одну и ту же базу.
+"""
+import os
+import random
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+
+from posts import counters, feeds, groups, rendering
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+PASSWORD = 'bench-password'
+FOLLOWS_PER_USER = 10
+WORDS = (
+    'кошка собака дом улица город река лес поле небо солнце дождь снег '
+    'ветер море берег мост дорога окно дверь стол книга письмо друг '
+    'утро вечер ночь зима лето весна осень работа школа музыка'
+).split()
+
+
+def database_path(scale):
+    return os.path.join(settings.BENCH_DIR, f'bench-{scale}.sqlite3')
+
+
+def use_database(path):
+    connection = connections['default']
+    connection.close()
+    connection.settings_dict['NAME'] = path
+    # Кеш (фрагменты, числа записей, реестр групп) описывает прежнюю базу.
+    cache.clear()
+    groups.invalidate()
+
+
+def _text(rng):
+    return ' '.join(rng.choices(WORDS, k=rng.randint(10, 60)))
+
+
+def seed(scale, fresh=False):
+    """Подключиться к базе масштаба scale, при необходимости создав её."""
+    os.makedirs(settings.BENCH_DIR, exist_ok=True)
+    path = database_path(scale)
+    if fresh and os.path.exists(path):
+        os.remove(path)
+    exists = os.path.exists(path)
+    use_database(path)
+    call_command('migrate', verbosity=0, interactive=False)
+    if exists and Post.objects.exists():
+        return path
+    rng = random.Random(scale)
+    password = make_password(PASSWORD)
+    user_count = max(20, scale // 20)
+    User.objects.bulk_create(
+        User(username=f'user{number}', password=password)
+        for number in range(user_count)
+    )
+    Group.objects.bulk_create(
+        Group(title=f'Группа {number}', slug=f'group-{number}',
+              description=_text(rng))
+        for number in range(max(3, min(50, scale // 1000)))
+    )
+    groups.invalidate()
+    user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+    group_ids = list(Group.objects.values_list('pk', flat=True))
+    Post.objects.bulk_create(
+        Post(author_id=rng.choice(user_ids),
+             group_id=rng.choice(group_ids + [None]),
+             text=text, **rendering.render(text))
+        for text in (_text(rng) for _ in range(scale))
+    )
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    Comment.objects.bulk_create(
+        Comment(post_id=rng.choice(post_ids),
+                author_id=rng.choice(user_ids),
+                text=_text(rng))
+        for _ in range(scale // 2)
+    )
+    Follow.objects.bulk_create(
+        Follow(user_id=user_id, author_id=author_id)
+        for user_id in user_ids
+        for author_id in rng.sample(user_ids, FOLLOWS_PER_USER + 1)
+        if author_id != user_id
+    )
+    counters.recount()
+    feeds.rebuild()
+    return path
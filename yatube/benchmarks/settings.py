@@ -0,0 +1,33 @@
+"""Настройки бенчмарков: отдельная база во временном каталоге, DEBUG
+выключен, быстрый хешер паролей, миниатюры считаются синхронно."""
+import os
+import tempfile
+
+from yatube.settings import *  # noqa: F401,F403
+
+DEBUG = False
+
+ALLOWED_HOSTS = ['*']
+
+BENCH_DIR = os.environ.get(
+    'YATUBE_BENCH_DIR', os.path.join(tempfile.gettempdir(), 'yatube-bench')
+)
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BENCH_DIR, 'bench.sqlite3'),
+        'OPTIONS': {'timeout': 30},
+    }
+}
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+MEDIA_ROOT = os.path.join(BENCH_DIR, 'media')
+
+THUMBNAIL_ASYNC = False
+
+# Общий уровень кеша — рядом с базой бенчмарка, а не кеш сайта.
+CACHES['default']['OPTIONS']['SHARED']['LOCATION'] = os.path.join(  # noqa: F405
+    BENCH_DIR, 'cache'
+)
@@ -0,0 +1,132 @@
+"""Параллельная запись в SQLite: режим по умолчанию против SQLITE_PRAGMAS.
+
+Запуск из каталога yatube:
+
+    python -m benchmarks.sqlite_writes [--writers 8] [--readers 4] \\
+        [--seconds 5]
+
+Писатели вставляют по одной строке в короткой транзакции (как
+add_comment и profile_follow), читатели в это время листают таблицу.
+Для каждого профиля печатаются записи в секунду и число ошибок
+«database is locked». Таймаут ожидания блокировки в обоих профилях
+одинаковый — как у Django по умолчанию (5 с).
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+
+from core.sqlite import pragma_statements  # noqa: E402
+
+PROFILES = {
+    'по умолчанию': {},
+    'SQLITE_PRAGMAS': settings.SQLITE_PRAGMAS,
+}
+
+
+def connect(path, pragmas):
+    db = sqlite3.connect(path, timeout=5, isolation_level=None,
+                         check_same_thread=False)
+    for statement in pragma_statements(pragmas):
+        db.execute(statement)
+    return db
+
+
+def prepare(path, pragmas):
+    db = connect(path, pragmas)
+    db.execute('CREATE TABLE comment (id INTEGER PRIMARY KEY, '
+               'post_id INTEGER, text TEXT)')
+    db.execute('CREATE INDEX comment_post ON comment (post_id, id)')
+    db.executemany('INSERT INTO comment (post_id, text) VALUES (?, ?)',
+                   ((number % 100, 'x' * 200) for number in range(20000)))
+    db.close()
+
+
+def write(db, number):
+    """Одна короткая транзакция; False, если база оказалась занята."""
+    try:
+        db.execute('BEGIN IMMEDIATE')
+        db.execute('INSERT INTO comment (post_id, text) VALUES (?, ?)',
+                   (number, 'комментарий'))
+        db.execute('COMMIT')
+        return True
+    except sqlite3.OperationalError:
+        if db.in_transaction:
+            db.execute('ROLLBACK')
+        return False
+
+
+def read(db, number):
+    try:
+        db.execute('SELECT id, text FROM comment WHERE post_id = ? '
+                   'ORDER BY id DESC LIMIT 50', (number % 100,)).fetchall()
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def worker(action, path, pragmas, number, stop, counts, lock):
+    db = connect(path, pragmas)
+    done = failed = 0
+    while time.monotonic() < stop:
+        if action(db, number):
+            done += 1
+        else:
+            failed += 1
+    db.close()
+    with lock:
+        counts[action.__name__] += done
+        counts['locked'] += failed
+
+
+def run(pragmas, writers, readers, seconds):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'writes.sqlite3')
+        prepare(path, pragmas)
+        counts = {'write': 0, 'read': 0, 'locked': 0}
+        lock = threading.Lock()
+        stop = time.monotonic() + seconds
+        threads = [
+            threading.Thread(target=worker, args=(
+                action, path, pragmas, number, stop, counts, lock
+            ))
+            for action, amount in ((write, writers), (read, readers))
+            for number in range(amount)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return {
+            'writes': counts['write'] / seconds,
+            'reads': counts['read'] / seconds,
+            'locked': counts['locked'],
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    options = parser.parse_args()
+    print(f'{"профиль":<16}{"записей/с":>12}{"чтений/с":>12}'
+          f'{"locked":>9}')
+    for name, pragmas in PROFILES.items():
+        result = run(pragmas, options.writers, options.readers,
+                     options.seconds)
+        print(f'{name:<16}{result["writes"]:>12.0f}{result["reads"]:>12.0f}'
+              f'{result["locked"]:>9}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from core import profiling, sqlite
+        profiling.install()
+        connection_created.connect(sqlite.apply_pragmas)
@@ -0,0 +1,293 @@
+"""Двухуровневый кеш: LRU в памяти процесса перед общим бэкендом.
+
+Общий уровень (OPTIONS['SHARED'], в настройках — файловый кеш) видят все
+воркеры; локальный уровень отвечает без обращения к нему, но хранит
+копию не дольше LOCAL_TIMEOUT секунд: столько другой процесс может не
+видеть чужих set() и delete(). Ключи с префиксами из SHARED_ONLY
+локально не хранятся — для данных, которые пользователь должен видеть
+сразу после своего же запроса в другой воркер. Локально значения лежат
+в pickle, как в LocMemCache, чтобы вызывающий не менял общую копию.
+
+get_or_set() защищает от лавины пересчётов:
+
+* вероятностный ранний пересчёт (XFetch): чем ближе конец срока и чем
+  дольше считалось значение, тем вероятнее, что очередной запрос
+  пересчитает его заранее, пока остальные получают старое;
+* single-flight: при промахе считает один поток (блокировки в процессе)
+  и один процесс (ключ-замок через add() в общем уровне), остальные
+  ждут готового значения не дольше LOCK_WAIT секунд.
+
+Счётчики попаданий копятся в процессе и раз в STATS_FLUSH_EVERY
+обращений складываются в общий уровень; общий итог отдаёт
+shared_stats() (команда cache_stats).
+"""
+import math
+import pickle
+import random
+import threading
+import time
+import zlib
+from collections import OrderedDict, namedtuple
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.module_loading import import_string
+
+# Значение в общем уровне: expires — момент истечения (time.time()) или
+# None, delta — сколько секунд оно считалось (0, если пришло из set()).
+Entry = namedtuple('Entry', 'value expires delta')
+
+STATS = ('local_hits', 'shared_hits', 'misses', 'early_refreshes',
+         'lock_waits')
+STATS_KEY = 'cache-stats:{}'
+STATS_FLUSH_EVERY = 100
+LOCK_KEY = 'lock:{}'
+LOCK_POLL = 0.05
+LOCK_STRIPES = 64
+
+
+class TwoLevelCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        shared = options.get('SHARED', {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        })
+        self._shared = import_string(shared['BACKEND'])(
+            shared.get('LOCATION', location), shared
+        )
+        self._local_max_entries = options.get('LOCAL_MAX_ENTRIES', 1000)
+        self._local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self._shared_only = tuple(options.get('SHARED_ONLY', ()))
+        self._beta = options.get('BETA', 1.0)
+        self._lock_timeout = options.get('LOCK_TIMEOUT', 30)
+        self._lock_wait = options.get('LOCK_WAIT', 5)
+        self._local = OrderedDict()
+        self._local_lock = threading.Lock()
+        self._stripes = [threading.RLock() for _ in range(LOCK_STRIPES)]
+        self._stats = dict.fromkeys(STATS, 0)
+        self._unflushed = 0
+
+    # Локальный уровень.
+
+    def _local_get(self, local_key):
+        with self._local_lock:
+            item = self._local.get(local_key)
+            if item is None:
+                return None
+            pickled, expires, delta, deadline = item
+            if deadline <= time.time():
+                del self._local[local_key]
+                return None
+            self._local.move_to_end(local_key)
+        return Entry(pickle.loads(pickled), expires, delta)
+
+    def _local_set(self, key, version, entry):
+        if key.startswith(self._shared_only):
+            return
+        local_key = self.make_key(key, version)
+        deadline = time.time() + self._local_timeout
+        if entry.expires is not None:
+            deadline = min(deadline, entry.expires)
+        pickled = pickle.dumps(entry.value, pickle.HIGHEST_PROTOCOL)
+        with self._local_lock:
+            self._local[local_key] = (pickled, entry.expires, entry.delta,
+                                      deadline)
+            self._local.move_to_end(local_key)
+            while len(self._local) > self._local_max_entries:
+                self._local.popitem(last=False)
+
+    def _local_delete(self, local_key):
+        with self._local_lock:
+            self._local.pop(local_key, None)
+
+    # Общие части.
+
+    def _count(self, name):
+        self._stats[name] += 1
+        self._unflushed += 1
+        if self._unflushed >= STATS_FLUSH_EVERY:
+            self.flush_stats()
+
+    def _lookup(self, key, version):
+        local_key = self.make_key(key, version)
+        self.validate_key(local_key)
+        entry = self._local_get(local_key)
+        if entry is not None:
+            self._count('local_hits')
+            return entry
+        entry = self._shared.get(key, version=version)
+        if entry is None:
+            self._count('misses')
+            return None
+        self._count('shared_hits')
+        self._local_set(key, version, entry)
+        return entry
+
+    def _timeout(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def _entry(self, value, timeout, delta=0):
+        timeout = self._timeout(timeout)
+        expires = None if timeout is None else time.time() + timeout
+        return Entry(value, expires, delta)
+
+    def _store(self, key, entry, timeout, version):
+        self._shared.set(key, entry, self._timeout(timeout), version=version)
+        self._local_set(key, version, entry)
+
+    def _expiring(self, entry):
+        """Решение XFetch: пора ли пересчитать значение заранее."""
+        if entry.expires is None or not entry.delta:
+            return False
+        gap = -entry.delta * self._beta * math.log(1 - random.random())
+        return time.time() + gap >= entry.expires
+
+    def _stripe(self, key, version):
+        local_key = self.make_key(key, version).encode()
+        return self._stripes[zlib.crc32(local_key) % LOCK_STRIPES]
+
+    def _wait(self, key, version):
+        """Дождаться значения, которое считает другой процесс."""
+        self._count('lock_waits')
+        deadline = time.monotonic() + self._lock_wait
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL)
+            entry = self._shared.get(key, version=version)
+            if entry is not None:
+                self._local_set(key, version, entry)
+                return entry
+        return None
+
+    # API BaseCache.
+
+    def get(self, key, default=None, version=None):
+        entry = self._lookup(key, version)
+        return default if entry is None else entry.value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._store(key, self._entry(value, timeout), timeout, version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        entry = self._entry(value, timeout)
+        if not self._shared.add(key, entry, self._timeout(timeout),
+                                version=version):
+            return False
+        self._local_set(key, version, entry)
+        return True
+
+    def delete(self, key, version=None):
+        self._local_delete(self.make_key(key, version))
+        self._shared.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        for key in keys:
+            self._local_delete(self.make_key(key, version))
+        self._shared.delete_many(keys, version=version)
+
+    def has_key(self, key, version=None):
+        return self._lookup(key, version) is not None
+
+    def clear(self):
+        with self._local_lock:
+            self._local.clear()
+        self._shared.clear()
+
+    def close(self, **kwargs):
+        self._shared.close(**kwargs)
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        """get_or_set() с ранним пересчётом и single-flight.
+
+        Пока другой поток или процесс пересчитывает значение, возвращается
+        старое, если оно есть; иначе ожидание до LOCK_WAIT секунд, после
+        чего значение считается без очереди.
+        """
+        if not callable(default):
+            return super().get_or_set(key, default, timeout, version)
+        entry = self._lookup(key, version)
+        if entry is not None and not self._expiring(entry):
+            return entry.value
+        stripe = self._stripe(key, version)
+        if entry is not None:
+            # Старое значение ещё годно: пересчитывает только тот, кто
+            # первым взял блокировку.
+            if not stripe.acquire(blocking=False):
+                return entry.value
+            self._count('early_refreshes')
+        elif not stripe.acquire(timeout=self._lock_wait):
+            return self._compute(key, default, timeout, version)
+        try:
+            return self._single_flight(key, default, timeout, version, entry)
+        finally:
+            stripe.release()
+
+    def _single_flight(self, key, default, timeout, version, stale):
+        """Пересчёт под ключом-замком в общем уровне."""
+        if stale is None:
+            # Пока поток ждал блокировку, значение мог посчитать другой.
+            entry = (self._local_get(self.make_key(key, version))
+                     or self._shared.get(key, version=version))
+            if entry is not None:
+                return entry.value
+        lock_key = LOCK_KEY.format(key)
+        if not self._shared.add(lock_key, 1, self._lock_timeout,
+                                version=version):
+            if stale is not None:
+                return stale.value
+            entry = self._wait(key, version)
+            if entry is not None:
+                return entry.value
+            return self._compute(key, default, timeout, version)
+        try:
+            return self._compute(key, default, timeout, version)
+        finally:
+            self._shared.delete(lock_key, version=version)
+
+    def _compute(self, key, default, timeout, version):
+        started = time.monotonic()
+        value = default()
+        self._store(key, self._entry(value, timeout,
+                                     time.monotonic() - started),
+                    timeout, version)
+        return value
+
+    # Статистика.
+
+    def stats(self):
+        """Счётчики этого процесса с долей попаданий."""
+        return _with_hit_rate(dict(self._stats))
+
+    def flush_stats(self):
+        """Сложить счётчики процесса в общий уровень."""
+        pending, self._stats = self._stats, dict.fromkeys(STATS, 0)
+        self._unflushed = 0
+        for name, value in pending.items():
+            if not value:
+                continue
+            key = STATS_KEY.format(name)
+            try:
+                self._shared.incr(key, value)
+            except ValueError:
+                if not self._shared.add(key, value, None):
+                    self._shared.incr(key, value)
+
+    def shared_stats(self):
+        """Счётчики всех процессов, сложенные в общем уровне."""
+        self.flush_stats()
+        values = self._shared.get_many([STATS_KEY.format(name)
+                                        for name in STATS])
+        return _with_hit_rate({name: values.get(STATS_KEY.format(name), 0)
+                               for name in STATS})
+
+    def reset_stats(self):
+        self._stats = dict.fromkeys(STATS, 0)
+        self._unflushed = 0
+        self._shared.delete_many([STATS_KEY.format(name) for name in STATS])
+
+
+def _with_hit_rate(stats):
+    lookups = stats['local_hits'] + stats['shared_hits'] + stats['misses']
+    hits = stats['local_hits'] + stats['shared_hits']
+    stats['hit_rate'] = round(hits / lookups, 4) if lookups else None
+    return stats
@@ -0,0 +1,12 @@
+from django.utils.functional import SimpleLazyObject
+
+from posts.follows import following_ids
+
+
+def following(request):
+    # Лениво: кеш подписок читается, только если шаблон его спросил.
+    return {
+        'following_ids': SimpleLazyObject(
+            lambda: following_ids(request.user)
+        ),
+    }
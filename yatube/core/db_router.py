@@ -0,0 +1,67 @@
+"""Маршрутизация чтения на реплики.
+
+Читают с реплик только представления, помеченные @replica_reads, и
+только вне транзакции на основной базе. После любой записи
+ReplicaRoutingMiddleware ставит cookie, и следующие
+REPLICA_STICKY_SECONDS секунд все запросы этого клиента читают с
+основной базы: автор сразу видит свой пост или комментарий, даже если
+реплика отстаёт. Без DATABASE_REPLICAS роутер ничего не меняет.
+"""
+import contextvars
+import functools
+import random
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+STICKY_COOKIE = 'primary_sticky'
+
+_state = contextvars.ContextVar('replica_state', default=None)
+
+
+class RoutingState:
+    def __init__(self, sticky):
+        self.sticky = sticky
+        self.replica_reads = False
+        self.wrote = False
+
+
+def replica_reads(view):
+    """Разрешить представлению читать с реплики."""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        state = _state.get()
+        if state is not None:
+            state.replica_reads = True
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+# Сессию только что вошедшего пользователя реплика может ещё не знать.
+PRIMARY_ONLY_APPS = {'sessions'}
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (state is None or not state.replica_reads or state.sticky
+                or model._meta.app_label in PRIMARY_ONLY_APPS
+                or not settings.DATABASE_REPLICAS
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии основной базы, объекты с них связаны между собой.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -0,0 +1,33 @@
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.management.base import BaseCommand, CommandError
+
+from core.cache import STATS, TwoLevelCache
+
+
+class Command(BaseCommand):
+    help = ('Попадания двухуровневого кеша (core.cache) по всем процессам: '
+            'локальный и общий уровень, промахи, ранние пересчёты и '
+            'ожидания чужого пересчёта')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cache', default=DEFAULT_CACHE_ALIAS)
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Обнулить счётчики после вывода'
+        )
+
+    def handle(self, *args, **options):
+        cache = caches[options['cache']]
+        if not isinstance(cache, TwoLevelCache):
+            raise CommandError(
+                f'Кеш {options["cache"]} — не core.cache.TwoLevelCache'
+            )
+        stats = cache.shared_stats()
+        for name in STATS:
+            self.stdout.write(f'{name:<16}{stats[name]:>12}')
+        hit_rate = stats['hit_rate']
+        self.stdout.write(f'{"hit_rate":<16}' + (
+            f'{hit_rate:>12.2%}' if hit_rate is not None else f'{"—":>12}'
+        ))
+        if options['reset']:
+            cache.reset_stats()
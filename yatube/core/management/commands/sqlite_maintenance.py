@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = ('Обслуживание SQLite: PRAGMA optimize, checkpoint журнала WAL '
+            'и оптимизация поискового индекса. Запускать по расписанию, '
+            'например раз в час из cron')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            '--checkpoint', default='TRUNCATE',
+            choices=('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'),
+            help='Режим wal_checkpoint'
+        )
+        parser.add_argument(
+            '--vacuum', action='store_true',
+            help='Дополнительно выполнить VACUUM (блокирует базу)'
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда работает только с SQLite')
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA optimize')
+            if search.TABLE in connection.introspection.table_names():
+                cursor.execute(
+                    f"INSERT INTO {search.TABLE}({search.TABLE}) "
+                    f"VALUES ('optimize')"
+                )
+            if options['vacuum']:
+                cursor.execute('VACUUM')
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+            if journal_mode != 'wal':
+                self.stdout.write(
+                    f'optimize выполнен; журнал в режиме {journal_mode}, '
+                    f'checkpoint не нужен'
+                )
+                return
+            cursor.execute(f'PRAGMA wal_checkpoint({options["checkpoint"]})')
+            busy, log_frames, checkpointed = cursor.fetchone()
+        self.stdout.write(
+            f'optimize выполнен; checkpoint {options["checkpoint"]}: '
+            f'кадров в журнале {log_frames}, перенесено {checkpointed}'
+            + (', база занята' if busy else '')
+        )
@@ -0,0 +1,102 @@
+import random
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.urls import Resolver404, resolve
+
+from core import db_router, pagecache, profiling
+
+
+class ProfilingMiddleware:
+    """Профиль запроса: время, SQL, шаблоны и кеш.
+
+    Включается настройкой PROFILING_ENABLED или для доли запросов
+    PROFILING_SAMPLE_RATE. Итог уходит в заголовок Server-Timing, а
+    запросы дольше PROFILING_SLOW_MS — в JSONL-журнал PROFILING_LOG_PATH.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def _sampled(self):
+        return (settings.PROFILING_ENABLED
+                or random.random() < settings.PROFILING_SAMPLE_RATE)
+
+    def __call__(self, request):
+        if not self._sampled():
+            return self.get_response(request)
+        profile = profiling.RequestProfile()
+        token = profiling.current.set(profile)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(profiling.sql_wrapper)
+                    )
+                response = self.get_response(request)
+        finally:
+            profiling.current.reset(token)
+        profile.finish()
+        response['Server-Timing'] = profile.server_timing()
+        if profile.total_ms >= settings.PROFILING_SLOW_MS:
+            profiling.log_slow(request, response, profile)
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """Состояние маршрутизации на время запроса и cookie после записи."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = db_router.RoutingState(
+            sticky=db_router.STICKY_COOKIE in request.COOKIES
+        )
+        token = db_router._state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            db_router._state.reset(token)
+        if state.wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                db_router.STICKY_COOKIE, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS, httponly=True,
+            )
+        return response
+
+
+class PageCacheMiddleware:
+    """Страницы PAGE_CACHE_VIEWS для анонимных посетителей из кеша.
+
+    Стоит перед SessionMiddleware: попадание не трогает ни сессию, ни
+    CSRF, ни представление. См. core.pagecache.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def _params(self, request):
+        # Разрешённые параметры запроса или None, если страницу не кешируем.
+        if pagecache.bypassed(request):
+            return None
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        return settings.PAGE_CACHE_VIEWS.get(match.view_name)
+
+    def __call__(self, request):
+        params = self._params(request)
+        if params is None:
+            return self.get_response(request)
+        key = pagecache.request_key(request, params)
+        response = pagecache.fetch(request, key)
+        if response is not None:
+            return response
+        response = self.get_response(request)
+        if pagecache.cacheable(request, response):
+            pagecache.store(key, response)
+            response['X-Page-Cache'] = 'miss'
+        return response
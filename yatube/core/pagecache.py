@@ -0,0 +1,106 @@
+"""Кеш целых страниц для анонимных посетителей.
+
+PageCacheMiddleware отдаёт страницы представлений из PAGE_CACHE_VIEWS
+целиком из кеша, не доходя до сессий, CSRF, контекст-процессоров и
+шаблонов. Ключ — хост, путь и разрешённые для представления параметры
+запроса (остальные, вроде utm_*, на ключ не влияют). Запросы с cookie
+из PAGE_CACHE_BYPASS_COOKIES (сессия, сообщения) идут мимо кеша.
+
+Сохраняется только ответ, который представление пометило тегами через
+tag(): теги — это зависимости страницы (например, области версий
+posts.versions). Для каждого тега в кеше лежит список ключей страниц;
+purge(tag) удаляет ровно эти страницы. Список обновляется без
+блокировки, и при гонке двух записей ключ страницы может потеряться:
+такая страница живёт до PAGE_CACHE_TIMEOUT.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe, urlencode
+
+PAGE_KEY = 'page:{}'
+TAG_KEY = 'page-tag:{}'
+
+
+def request_key(request, params):
+    """Ключ страницы: хост, путь и параметры params в порядке сортировки."""
+    query = urlencode(sorted(
+        (name, value)
+        for name in params
+        for value in request.GET.getlist(name)
+    ))
+    raw = f'{request.get_host()}{request.path}?{query}'
+    return PAGE_KEY.format(hashlib.md5(raw.encode()).hexdigest())
+
+
+def bypassed(request):
+    return (request.method not in ('GET', 'HEAD')
+            or any(name in request.COOKIES
+                   for name in settings.PAGE_CACHE_BYPASS_COOKIES))
+
+
+def tag(response, *tags):
+    """Разрешить кешировать ответ; tags — от чего зависит страница."""
+    response.page_cache_tags = tags
+    return response
+
+
+def fetch(request, key):
+    """Ответ из кеша (с учётом If-None-Match) или None."""
+    page = cache.get(key)
+    if page is None:
+        return None
+    response = HttpResponse(page['content'])
+    for name, value in page['headers']:
+        response[name] = value
+    response['X-Page-Cache'] = 'hit'
+    return get_conditional_response(
+        request,
+        etag=response.get('ETag'),
+        last_modified=parse_http_date_safe(response.get('Last-Modified', '')),
+        response=response,
+    )
+
+
+def cacheable(request, response):
+    return (request.method == 'GET'
+            and response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and getattr(response, 'page_cache_tags', None))
+
+
+def store(key, response):
+    timeout = settings.PAGE_CACHE_TIMEOUT
+    cache.set(key, {
+        'content': response.content,
+        'headers': list(response.items()),
+    }, timeout)
+    for name in set(response.page_cache_tags):
+        tag_key = TAG_KEY.format(name)
+        keys = cache.get(tag_key) or []
+        if key not in keys:
+            cache.set(tag_key, [*keys, key], timeout)
+
+
+def purge(*tags):
+    """Удалить страницы, зависящие от tags.
+
+    Сразу и ещё раз после коммита: иначе запрос, прочитавший данные до
+    коммита, успел бы снова положить старую страницу.
+    """
+    tag_keys = [TAG_KEY.format(name) for name in set(tags)]
+    if not tag_keys:
+        return
+
+    def run():
+        found = cache.get_many(tag_keys)
+        pages = {key for keys in found.values() for key in keys}
+        cache.delete_many([*pages, *found])
+
+    run()
+    transaction.on_commit(run)
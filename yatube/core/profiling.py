@@ -0,0 +1,212 @@
+"""Лёгкое профилирование запросов: SQL, шаблоны, кеш.
+
+Профиль текущего запроса лежит в contextvar, поэтому обёртки ничего не
+стоят, пока профилирование выключено: они проверяют переменную и сразу
+вызывают исходный метод. SQL считается через
+``connection.execute_wrapper``, шаблоны и кеш — через обёртки
+Template.render и методов get/get_many (и get_or_set, если бэкенд его
+переопределяет) у классов бэкендов кеша, которые ставятся один раз при
+старте (см. CoreConfig.ready).
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import time
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.template import base as template_base
+
+current = contextvars.ContextVar('profile', default=None)
+
+SLOWEST_QUERIES = 5
+SQL_PREVIEW = 300
+
+_MISSING = object()
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total_ms = 0.0
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.queries = []
+        self.template_ms = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def finish(self):
+        self.total_ms = (time.perf_counter() - self.started) * 1000
+
+    def add_query(self, sql, duration_ms):
+        self.sql_count += 1
+        self.sql_ms += duration_ms
+        self.queries.append((duration_ms, sql))
+        if len(self.queries) > SLOWEST_QUERIES:
+            self.queries.sort(reverse=True)
+            del self.queries[SLOWEST_QUERIES:]
+
+    def server_timing(self):
+        return ', '.join((
+            f'total;dur={self.total_ms:.1f}',
+            f'sql;dur={self.sql_ms:.1f};desc="{self.sql_count} queries"',
+            f'tpl;dur={self.template_ms:.1f}',
+            f'cache;desc="{self.cache_hits} hits, '
+            f'{self.cache_misses} misses"',
+        ))
+
+    def as_dict(self):
+        return {
+            'total_ms': round(self.total_ms, 2),
+            'sql_count': self.sql_count,
+            'sql_ms': round(self.sql_ms, 2),
+            'template_ms': round(self.template_ms, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'slowest_queries': [
+                {'ms': round(duration, 2), 'sql': sql[:SQL_PREVIEW]}
+                for duration, sql in sorted(self.queries, reverse=True)
+            ],
+        }
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    profile = current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.add_query(sql, (time.perf_counter() - started) * 1000)
+
+
+def _wrap_render(render):
+    @functools.wraps(render)
+    def wrapper(self, context):
+        profile = current.get()
+        if profile is None:
+            return render(self, context)
+        # Вложенные include рендерятся внутри внешнего шаблона: время
+        # считается только у самого внешнего.
+        profile.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            profile.template_depth -= 1
+            if not profile.template_depth:
+                profile.template_ms += (
+                    (time.perf_counter() - started) * 1000
+                )
+    wrapper._profiled = True
+    return wrapper
+
+
+def _wrap_get(get):
+    @functools.wraps(get)
+    def wrapper(self, key, default=None, version=None):
+        profile = current.get()
+        if profile is None:
+            return get(self, key, default, version)
+        value = get(self, key, _MISSING, version)
+        if value is _MISSING:
+            profile.cache_misses += 1
+            return default
+        profile.cache_hits += 1
+        return value
+    wrapper._profiled = True
+    return wrapper
+
+
+def _wrap_get_many(get_many):
+    @functools.wraps(get_many)
+    def wrapper(self, keys, version=None):
+        values = get_many(self, keys, version=version)
+        profile = current.get()
+        if profile is not None:
+            keys = list(keys)
+            profile.cache_hits += len(values)
+            profile.cache_misses += len(keys) - len(values)
+        return values
+    wrapper._profiled = True
+    return wrapper
+
+
+def _wrap_get_or_set(get_or_set):
+    # Базовый get_or_set() идёт через get() и уже посчитан; обёртка
+    # ставится только на собственные реализации (core.cache).
+    @functools.wraps(get_or_set)
+    def wrapper(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        profile = current.get()
+        if profile is None or not callable(default):
+            return get_or_set(self, key, default, timeout, version)
+        computed = False
+
+        def compute():
+            nonlocal computed
+            computed = True
+            return default()
+
+        value = get_or_set(self, key, compute, timeout, version)
+        if computed:
+            profile.cache_misses += 1
+        else:
+            profile.cache_hits += 1
+        return value
+    wrapper._profiled = True
+    return wrapper
+
+
+def _patch(owner, name, wrap):
+    method = getattr(owner, name, None)
+    if method is not None and not getattr(method, '_profiled', False):
+        setattr(owner, name, wrap(method))
+
+
+def install():
+    """Поставить обёртки шаблонов и кеша; повторный вызов безопасен."""
+    _patch(template_base.Template, 'render', _wrap_render)
+    for alias in settings.CACHES:
+        backend = type(caches[alias])
+        _patch(backend, 'get', _wrap_get)
+        _patch(backend, 'get_many', _wrap_get_many)
+        if backend.get_or_set is not BaseCache.get_or_set:
+            _patch(backend, 'get_or_set', _wrap_get_or_set)
+
+
+_slow_logs = {}
+
+
+def slow_log():
+    """Логгер журнала медленных запросов, по одному на путь файла."""
+    path = settings.PROFILING_LOG_PATH
+    if path not in _slow_logs:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handler = RotatingFileHandler(
+            path,
+            maxBytes=settings.PROFILING_LOG_MAX_BYTES,
+            backupCount=settings.PROFILING_LOG_BACKUPS,
+            encoding='utf-8',
+        )
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger = logging.Logger('core.profiling.slow', logging.INFO)
+        logger.addHandler(handler)
+        _slow_logs[path] = logger
+    return _slow_logs[path]
+
+
+def log_slow(request, response, profile):
+    slow_log().info(json.dumps({
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'method': request.method,
+        'path': request.get_full_path(),
+        'status': response.status_code,
+        **profile.as_dict(),
+    }, ensure_ascii=False))
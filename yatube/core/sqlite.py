@@ -0,0 +1,34 @@
+"""Профиль производительности SQLite.
+
+Прагмы из SQLITE_PRAGMAS выполняются для каждого нового соединения
+(сигнал connection_created, см. CoreConfig.ready). Главная из них —
+journal_mode=WAL: читатели не блокируют писателя, а писатель —
+читателей, поэтому параллельные комментарии и подписки не упираются в
+«database is locked».
+"""
+import re
+
+from django.conf import settings
+
+_SAFE = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+def pragma_statements(pragmas):
+    """SQL для словаря {прагма: значение}; имена и значения проверяются."""
+    statements = []
+    for name, value in pragmas.items():
+        if not _SAFE.match(name) or not _SAFE.match(str(value)):
+            raise ValueError(f'Недопустимая прагма SQLite: {name}={value}')
+        statements.append(f'PRAGMA {name}={value}')
+    return statements
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    cursor = connection.connection.cursor()
+    try:
+        for statement in pragma_statements(settings.SQLITE_PRAGMAS):
+            cursor.execute(statement)
+    finally:
+        cursor.close()
@@ -0,0 +1,42 @@
+"""{% cache %}, который заполняет фрагмент через get_or_set().
+
+Синтаксис и ключи — как у {% load cache %} из Django. Разница в промахе:
+с core.cache.TwoLevelCache фрагмент рендерит один запрос, а остальные
+получают готовый, и горячие фрагменты пересчитываются заранее.
+"""
+from django import template
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+from django.templatetags import cache as django_cache
+
+register = template.Library()
+
+
+class CacheNode(django_cache.CacheNode):
+    def render(self, context):
+        expire_time = self.expire_time_var.resolve(context)
+        if expire_time is not None:
+            try:
+                expire_time = int(expire_time)
+            except (ValueError, TypeError):
+                raise template.TemplateSyntaxError(
+                    f'"cache" tag got a non-integer timeout value: '
+                    f'{expire_time!r}'
+                )
+        fragment_cache = caches[
+            self.cache_name.resolve(context) if self.cache_name
+            else 'default'
+        ]
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        return fragment_cache.get_or_set(
+            make_template_fragment_key(self.fragment_name, vary_on),
+            lambda: self.nodelist.render(context),
+            expire_time,
+        )
+
+
+@register.tag('cache')
+def do_cache(parser, token):
+    node = django_cache.do_cache(parser, token)
+    return CacheNode(node.nodelist, node.expire_time_var, node.fragment_name,
+                     node.vary_on, node.cache_name)
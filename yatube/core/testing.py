@@ -0,0 +1,38 @@
+"""Настройки, с которыми идут тесты (manage.py test и pytest).
+
+Тесты не должны делить кеш с запущенным сайтом: общий уровень
+core.cache — в памяти процесса. Страницы в тестах не кешируются: тесты
+смотрят в response.context и считают запросы, а база между ними
+откатывается без сигналов. core/tests/test_pagecache.py включает кеш
+страниц сам.
+
+manage.py test подключает их через TEST_RUNNER, pytest — через
+conftest.py в корне репозитория.
+"""
+import copy
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+def test_settings():
+    caches = copy.deepcopy(settings.CACHES)
+    caches['default']['OPTIONS']['SHARED'] = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'yatube-tests',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    }
+    return {'CACHES': caches, 'PAGE_CACHE_VIEWS': {}}
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._test_settings = override_settings(**test_settings())
+        self._test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._test_settings.disable()
+        super().teardown_test_environment(**kwargs)
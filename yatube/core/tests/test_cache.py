@@ -0,0 +1,207 @@
+import itertools
+import tempfile
+import threading
+import time
+from io import StringIO
+
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import SimpleTestCase, override_settings
+
+from core.cache import LOCK_KEY, TwoLevelCache
+
+_locations = itertools.count()
+
+
+def make_cache(location=None, **options):
+    """Кеш с общим уровнем в LocMemCache: экземпляры с одним location
+    ведут себя как воркеры с общим кешем."""
+    if location is None:
+        location = f'two-level-test-{next(_locations)}'
+    return TwoLevelCache('', {
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'SHARED': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': location,
+                'TIMEOUT': None,
+            },
+            **options,
+        },
+    })
+
+
+class Counter:
+    def __init__(self, delay=0):
+        self.calls = 0
+        self.delay = delay
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return f'value {self.calls}'
+
+
+class TwoLevelCacheTests(SimpleTestCase):
+    def test_set_get_delete(self):
+        cache = make_cache()
+        cache.set('key', [1, 2])
+        self.assertEqual(cache.get('key'), [1, 2])
+        self.assertTrue(cache.add('other', 'value'))
+        self.assertFalse(cache.add('other', 'new'))
+        cache.delete_many(['key', 'other'])
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(cache.get('other', 'default'), 'default')
+
+    def test_local_copy_is_not_shared_with_caller(self):
+        cache = make_cache()
+        cache.set('key', [1])
+        cache.get('key').append(2)
+        self.assertEqual(cache.get('key'), [1])
+
+    def test_other_process_sees_delete_after_local_timeout(self):
+        location = 'two-level-test-workers'
+        first = make_cache(location, LOCAL_TIMEOUT=60,
+                           SHARED_ONLY=['follows:'])
+        second = make_cache(location, LOCAL_TIMEOUT=60,
+                            SHARED_ONLY=['follows:'])
+        first.set('groups', 'old')
+        first.set('follows:1', 'old')
+        self.assertEqual(second.get('groups'), 'old')
+        self.assertEqual(second.get('follows:1'), 'old')
+        first.delete('groups')
+        first.delete('follows:1')
+        # Локальная копия живёт до LOCAL_TIMEOUT, кроме SHARED_ONLY.
+        self.assertEqual(second.get('groups'), 'old')
+        self.assertIsNone(second.get('follows:1'))
+        impatient = make_cache(location, LOCAL_TIMEOUT=0)
+        impatient.get('groups')
+        self.assertIsNone(impatient.get('groups'))
+
+    def test_local_level_is_lru(self):
+        cache = make_cache(LOCAL_MAX_ENTRIES=2)
+        for key in ('a', 'b', 'c'):
+            cache.set(key, key)
+        cache.get('b')
+        self.assertEqual(list(cache._local), [
+            cache.make_key('c'), cache.make_key('b')
+        ])
+        # Вытесненное из памяти по-прежнему лежит в общем уровне.
+        self.assertEqual(cache.get('a'), 'a')
+        self.assertEqual(cache.stats()['shared_hits'], 1)
+
+    def test_get_or_set_computes_once_for_concurrent_threads(self):
+        cache = make_cache()
+        compute = Counter(delay=0.1)
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    cache.get_or_set('key', compute, 60)
+                )
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(compute.calls, 1)
+        self.assertEqual(results, ['value 1'] * 8)
+
+    def test_get_or_set_waits_for_other_process(self):
+        location = 'two-level-test-flight'
+        first = make_cache(location)
+        second = make_cache(location)
+        compute = Counter(delay=0.2)
+        thread = threading.Thread(
+            target=first.get_or_set, args=('key', compute, 60)
+        )
+        thread.start()
+        time.sleep(0.05)
+        self.assertEqual(second.get_or_set('key', compute, 60), 'value 1')
+        thread.join()
+        self.assertEqual(compute.calls, 1)
+        self.assertEqual(second.stats()['lock_waits'], 1)
+
+    def test_early_refresh(self):
+        never = make_cache(BETA=0)
+        compute = Counter(delay=0.01)
+        never.get_or_set('key', compute, 60)
+        never.get_or_set('key', compute, 60)
+        self.assertEqual(compute.calls, 1)
+        always = make_cache(BETA=10 ** 9)
+        compute = Counter(delay=0.01)
+        always.get_or_set('key', compute, 60)
+        self.assertEqual(always.get_or_set('key', compute, 60), 'value 2')
+        self.assertEqual(always.stats()['early_refreshes'], 1)
+
+    def test_early_refresh_serves_stale_while_other_recomputes(self):
+        cache = make_cache(BETA=10 ** 9)
+        compute = Counter(delay=0.01)
+        cache.get_or_set('key', compute, 60)
+        cache._shared.add(LOCK_KEY.format('key'), 1)
+        self.assertEqual(cache.get_or_set('key', compute, 60), 'value 1')
+        self.assertEqual(compute.calls, 1)
+
+    def test_stats_are_summed_across_processes(self):
+        location = 'two-level-test-stats'
+        first = make_cache(location)
+        second = make_cache(location)
+        first.reset_stats()
+        first.set('key', 1)
+        first.get('key')
+        second.get('key')
+        second.get('missing')
+        self.assertEqual(first.stats()['hit_rate'], 1.0)
+        first.flush_stats()
+        stats = second.shared_stats()
+        self.assertEqual(stats['local_hits'], 1)
+        self.assertEqual(stats['shared_hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hit_rate'], round(2 / 3, 4))
+
+    def test_file_based_shared_level(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = TwoLevelCache('', {'OPTIONS': {'SHARED': {
+                'BACKEND':
+                    'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': directory,
+            }}})
+            other = TwoLevelCache('', {'OPTIONS': {'SHARED': {
+                'BACKEND':
+                    'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': directory,
+            }}})
+            cache.set('key', {'a': 1}, 60)
+            self.assertEqual(other.get('key'), {'a': 1})
+            self.assertEqual(other.get_or_set('new', lambda: 2, 60), 2)
+            self.assertEqual(cache.get('new'), 2)
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'core.cache.TwoLevelCache',
+    'OPTIONS': {'SHARED': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'two-level-test-settings',
+    }},
+}})
+class CacheIntegrationTests(SimpleTestCase):
+    def test_fragment_is_rendered_once(self):
+        template = Template(
+            '{% load fragment_cache %}'
+            '{% cache 60 test_fragment key %}{{ compute }}{% endcache %}'
+        )
+        compute = Counter()
+        for _ in range(3):
+            output = template.render(Context({'compute': compute,
+                                              'key': 'once'}))
+        self.assertEqual(output, 'value 1')
+        self.assertEqual(compute.calls, 1)
+
+    def test_cache_stats_command(self):
+        out = StringIO()
+        call_command('cache_stats', '--reset', stdout=out)
+        self.assertIn('hit_rate', out.getvalue())
@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core import db_router
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1', 'replica_2'])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = db_router.ReplicaRouter()
+
+    def route(self, sticky=False, replica_reads=True):
+        state = db_router.RoutingState(sticky=sticky)
+        state.replica_reads = replica_reads
+        token = db_router._state.set(state)
+        try:
+            return (self.router.db_for_read(Post),
+                    self.router.db_for_write(Post), state.wrote)
+        finally:
+            db_router._state.reset(token)
+
+    def test_marked_views_read_from_replicas(self):
+        read, write, wrote = self.route()
+        self.assertIn(read, ('replica_1', 'replica_2'))
+        self.assertEqual(write, DEFAULT_DB_ALIAS)
+        self.assertTrue(wrote)
+
+    def test_other_reads_stay_on_primary(self):
+        self.assertEqual(self.route(replica_reads=False)[0], DEFAULT_DB_ALIAS)
+        self.assertEqual(self.route(sticky=True)[0], DEFAULT_DB_ALIAS)
+        self.assertEqual(self.router.db_for_read(Post), DEFAULT_DB_ALIAS)
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica_1', 'posts'))
+        self.assertIsNone(self.router.allow_migrate('default', 'posts'))
+
+
+# Реплика «default» — та же база, поэтому запросы в тесте видят данные
+# транзакции TestCase.
+@override_settings(DATABASE_REPLICAS=[DEFAULT_DB_ALIAS])
+class StickyPrimaryTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_write_sets_sticky_cookie(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn(db_router.STICKY_COOKIE, response.cookies)
+        response = self.client.post(reverse('posts:post_create'),
+                                    {'text': 'Новый пост'})
+        self.assertIn(db_router.STICKY_COOKIE, response.cookies)
+        self.assertEqual(
+            response.cookies[db_router.STICKY_COOKIE]['max-age'], 10
+        )
@@ -0,0 +1,150 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+PAGE_CACHE_VIEWS = {
+    'posts:index': ('page', 'cursor'),
+    'posts:group_list': ('page', 'cursor'),
+    'posts:profile': ('page', 'cursor'),
+    'posts:post_detail': ('cursor',),
+}
+
+
+@override_settings(PAGE_CACHE_VIEWS=PAGE_CACHE_VIEWS)
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        cls.other_group = Group.objects.create(title='Другая', slug='other',
+                                               description='Описание')
+        cls.post = Post.objects.create(text='Пост в группе',
+                                       author=cls.author, group=cls.group)
+        cls.other_post = Post.objects.create(text='Другой пост',
+                                             author=cls.author,
+                                             group=cls.other_group)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def assertCached(self, url, hit=True):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get('X-Page-Cache'),
+                         'hit' if hit else 'miss')
+        return response
+
+    def test_second_anonymous_request_is_served_from_cache(self):
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'group'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                first = self.assertCached(url, hit=False)
+                with self.assertNumQueries(0):
+                    second = self.assertCached(url)
+                self.assertEqual(second.content, first.content)
+                self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_key_ignores_unknown_params(self):
+        url = reverse('posts:index')
+        self.assertCached(url, hit=False)
+        self.assertCached(url + '?utm_source=mail')
+        self.assertCached(url + '?page=1', hit=False)
+
+    def test_logged_in_user_bypasses_cache(self):
+        url = reverse('posts:index')
+        self.assertCached(url, hit=False)
+        self.client.force_login(self.author)
+        response = self.client.get(url)
+        self.assertNotIn('X-Page-Cache', response)
+        self.assertIsNotNone(response.context)
+
+    def test_other_views_are_not_cached(self):
+        response = self.client.get(reverse('posts:search'), {'q': 'Пост'})
+        self.assertNotIn('X-Page-Cache', response)
+
+    def test_conditional_request_on_hit(self):
+        url = reverse('posts:index')
+        etag = self.assertCached(url, hit=False)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_post_purges_only_its_pages(self):
+        index = reverse('posts:index')
+        group = reverse('posts:group_list', kwargs={'slug': 'group'})
+        other = reverse('posts:group_list', kwargs={'slug': 'other'})
+        detail = reverse('posts:post_detail',
+                         kwargs={'post_id': self.other_post.pk})
+        for url in (index, group, other, detail):
+            self.assertCached(url, hit=False)
+        Post.objects.create(text='Свежий пост', author=self.author,
+                            group=self.group)
+        self.assertContains(self.assertCached(index, hit=False),
+                            'Свежий пост')
+        self.assertContains(self.assertCached(group, hit=False),
+                            'Свежий пост')
+        self.assertCached(other)
+        # Страница поста показывает число постов автора.
+        self.assertCached(detail, hit=False)
+
+    def test_comment_purges_post_page(self):
+        index = reverse('posts:index')
+        detail = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        other = reverse('posts:post_detail',
+                        kwargs={'post_id': self.other_post.pk})
+        for url in (index, detail, other):
+            self.assertCached(url, hit=False)
+        Comment.objects.create(post=self.post, author=self.author,
+                               text='Новый комментарий')
+        self.assertContains(self.assertCached(detail, hit=False),
+                            'Новый комментарий')
+        self.assertCached(index)
+        self.assertCached(other)
+
+    def test_group_change_purges_its_pages(self):
+        group = reverse('posts:group_list', kwargs={'slug': 'group'})
+        other = reverse('posts:group_list', kwargs={'slug': 'other'})
+        detail = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        for url in (group, other, detail):
+            self.assertCached(url, hit=False)
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertContains(self.assertCached(group, hit=False),
+                            'Новое название')
+        self.assertContains(self.assertCached(detail, hit=False),
+                            'Новое название')
+        self.assertCached(other)
+
+    def test_group_rename_purges_profiles_of_its_authors(self):
+        profile = reverse('posts:profile', kwargs={'username': 'author'})
+        self.assertCached(profile, hit=False)
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'renamed'
+        group.save()
+        response = self.assertCached(profile, hit=False)
+        self.assertContains(response, '/group/renamed/')
+        self.assertNotContains(response, '/group/group/')
+
+    def test_commenter_rename_purges_post_page(self):
+        commenter = User.objects.create_user(username='commenter')
+        Comment.objects.create(post=self.post, author=commenter,
+                               text='Комментарий')
+        detail = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.assertCached(detail, hit=False)
+        commenter.username = 'renamed'
+        commenter.save()
+        response = self.assertCached(detail, hit=False)
+        self.assertContains(response, '/profile/renamed/')
+        self.assertNotContains(response, '/profile/commenter/')
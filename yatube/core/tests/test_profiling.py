@@ -0,0 +1,61 @@
+import json
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import groups
+from posts.models import Post
+
+User = get_user_model()
+
+
+class ProfilingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        # Реестр групп прогрет, как в работающем процессе.
+        groups.all_groups()
+        self.client = Client()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.log_path = os.path.join(directory.name, 'slow.jsonl')
+
+    def test_disabled_by_default(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn('Server-Timing', response)
+
+    def test_server_timing_counts_sql_templates_and_cache(self):
+        url = reverse('posts:index')
+        with override_settings(PROFILING_ENABLED=True,
+                               PROFILING_SLOW_MS=10 ** 6,
+                               PROFILING_LOG_PATH=self.log_path):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+        timing = response['Server-Timing']
+        self.assertIn(f'desc="{len(queries)} queries"', timing)
+        self.assertRegex(timing, r'tpl;dur=[1-9]|tpl;dur=0\.[1-9]')
+        # Фрагмента поста и числа записей ленты в кеше ещё нет.
+        self.assertIn('2 misses', timing)
+        self.assertFalse(os.path.exists(self.log_path))
+
+    @override_settings(PROFILING_SAMPLE_RATE=1.0, PROFILING_SLOW_MS=0)
+    def test_slow_requests_are_logged(self):
+        with self.settings(PROFILING_LOG_PATH=self.log_path):
+            self.client.get(reverse('posts:index'), {'page': 1})
+        with open(self.log_path, encoding='utf-8') as log:
+            entry = json.loads(log.readline())
+        self.assertEqual(entry['path'], '/?page=1')
+        self.assertEqual(entry['status'], 200)
+        self.assertGreater(entry['sql_count'], 0)
+        self.assertTrue(entry['slowest_queries'])
@@ -0,0 +1,57 @@
+import os
+import sqlite3
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core import sqlite
+
+
+class PragmaStatementsTests(SimpleTestCase):
+    def test_statements_keep_order(self):
+        self.assertEqual(
+            sqlite.pragma_statements({'busy_timeout': 5000,
+                                      'journal_mode': 'WAL',
+                                      'cache_size': -2000}),
+            ['PRAGMA busy_timeout=5000', 'PRAGMA journal_mode=WAL',
+             'PRAGMA cache_size=-2000'],
+        )
+
+    def test_injection_is_rejected(self):
+        for pragmas in ({'journal_mode': 'WAL; DROP TABLE posts_post'},
+                        {'user_version=1; --': 1}):
+            with self.subTest(pragmas=pragmas):
+                with self.assertRaises(ValueError):
+                    sqlite.pragma_statements(pragmas)
+
+    def test_file_database_switches_to_wal(self):
+        with tempfile.TemporaryDirectory() as directory:
+            db = sqlite3.connect(os.path.join(directory, 'db.sqlite3'))
+            for statement in sqlite.pragma_statements(
+                {'journal_mode': 'WAL', 'synchronous': 'NORMAL'}
+            ):
+                db.execute(statement)
+            self.assertEqual(
+                db.execute('PRAGMA journal_mode').fetchone()[0], 'wal'
+            )
+            self.assertEqual(
+                db.execute('PRAGMA synchronous').fetchone()[0], 1
+            )
+            db.close()
+
+
+class ApplyPragmasTests(TestCase):
+    @override_settings(SQLITE_PRAGMAS={'cache_size': -4096})
+    def test_signal_applies_settings(self):
+        sqlite.apply_pragmas(sender=None, connection=connection)
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -4096)
+
+    def test_maintenance_command(self):
+        out = StringIO()
+        call_command('sqlite_maintenance', stdout=out)
+        self.assertIn('optimize', out.getvalue())
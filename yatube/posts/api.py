@@ -0,0 +1,222 @@
+"""JSON API v1: те же ленты, пост и комментарии, что и HTML-страницы.
+
+Каждый список — набор из posts.queries, который читается через
+values(): объекты моделей не создаются, а в SQL попадают только поля
+из ``?fields=id,text,author`` (по умолчанию — все). Пагинация курсорная,
+как у HTML (``?cursor=``, ``?limit=`` до MAX_LIMIT); ответы сжимаются
+gzip, если клиент его принимает, и получают ETag по тем же версиям
+областей (posts.versions), что и страницы.
+"""
+import functools
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+from django.views.decorators.gzip import gzip_page
+
+from core.db_router import replica_reads
+from posts import follows, groups, queries
+from posts.models import FeedEntry, Post
+from posts.paginators import CursorPaginator
+from posts.versions import (GLOBAL, author_scope, conditional,
+                            follower_scope, post_validators,
+                            scope_validators, scopes_validators)
+
+User = get_user_model()
+
+MAX_LIMIT = 100
+
+# Имя поля в ответе -> поле для values().
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'preview': 'preview',
+    'pub_date': 'pub_date',
+    'updated_at': 'updated_at',
+    'author': 'author__username',
+    'group': 'group_id',
+    'image': 'image',
+    'comments_count': 'comments_count',
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'created': 'created',
+    'author': 'author__username',
+}
+GROUP_FIELDS = ('id', 'slug', 'title', 'description')
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _response(data, status=200):
+    return JsonResponse(data, status=status,
+                        json_dumps_params={'ensure_ascii': False})
+
+
+def _error(message, status):
+    return _response({'error': message}, status=status)
+
+
+def _fields(request, available):
+    """Имена полей из ?fields= в порядке запроса."""
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(available)
+    names = list(dict.fromkeys(
+        name.strip() for name in raw.split(',') if name.strip()
+    ))
+    unknown = [name for name in names if name not in available]
+    if unknown or not names:
+        raise BadRequest(
+            f'неизвестные поля: {", ".join(unknown)}; '
+            f'доступны: {", ".join(available)}'
+        )
+    return names
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get('limit', settings.VIEW_COUNT))
+    except ValueError:
+        raise BadRequest('limit должен быть числом')
+    if not 1 <= limit <= MAX_LIMIT:
+        raise BadRequest(f'limit от 1 до {MAX_LIMIT}')
+    return limit
+
+
+def _convert(name, value):
+    # Группа берётся из реестра, картинка превращается в URL.
+    if name == 'group':
+        group = groups.by_pk(value) if value is not None else None
+        return group.slug if group is not None else None
+    if name == 'image':
+        return (Post._meta.get_field('image').storage.url(value)
+                if value else None)
+    return value
+
+
+def _serialize(row, lookups):
+    return {name: _convert(name, row[lookup])
+            for name, lookup in lookups.items()}
+
+
+def _page(request, queryset, available, prefix=''):
+    """Страница values()-строк queryset с курсорами соседних страниц."""
+    names = _fields(request, available)
+    lookups = {name: prefix + available[name] for name in names}
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    keys = [field.lstrip('-') for field in ordering]
+    paginator = CursorPaginator(
+        queryset.values(*dict.fromkeys([*lookups.values(), *keys])),
+        _limit(request),
+        ordering=ordering,
+    )
+    page = paginator.get_page(request.GET.get('cursor'))
+    return _response({
+        'results': [_serialize(row, lookups) for row in page],
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+    })
+
+
+def _post_page(request, queryset):
+    # Лента подписок может прийти записями FeedEntry: поля поста у них
+    # читаются через post__.
+    prefix = 'post__' if queryset.model is FeedEntry else ''
+    return _page(request, queryset, POST_FIELDS, prefix)
+
+
+def api_view(view):
+    """gzip и ответ 400 на неверные параметры запроса."""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except BadRequest as error:
+            return _error(str(error), 400)
+    return gzip_page(wrapper)
+
+
+@api_view
+@replica_reads
+@conditional(scope_validators(lambda: GLOBAL))
+def posts(request):
+    return _post_page(request, queries.index_posts())
+
+
+@api_view
+@replica_reads
+@conditional(scope_validators(queries.scope_of_group))
+def group_posts(request, slug):
+    group = groups.by_slug(slug)
+    if group is None:
+        return _error('группа не найдена', 404)
+    return _post_page(request, queries.group_posts(group))
+
+
+@api_view
+@replica_reads
+@conditional(scope_validators(queries.scope_of_author))
+def author_posts(request, username):
+    author = User.objects.filter(username=username).only('pk').first()
+    if author is None:
+        return _error('пользователь не найден', 404)
+    return _post_page(request, queries.author_posts(author))
+
+
+def feed_validators(request):
+    """Лента подписок: подписки пользователя и области его авторов.
+
+    Новые, изменённые и удалённые посты автора меняют версию его области,
+    поэтому отдельной отметки о записях FeedEntry не нужно.
+    """
+    if not request.user.is_authenticated:
+        return None, None
+    return scopes_validators(request, [
+        follower_scope(request.user.pk),
+        *map(author_scope, sorted(follows.following_ids(request.user))),
+    ])
+
+
+@api_view
+@replica_reads
+@conditional(feed_validators)
+def feed(request):
+    if not request.user.is_authenticated:
+        return _error('нужна авторизация', 401)
+    return _post_page(request, queries.feed_posts(request.user))
+
+
+@api_view
+@replica_reads
+@conditional(post_validators)
+def post_detail(request, post_id):
+    names = _fields(request, POST_FIELDS)
+    lookups = {name: POST_FIELDS[name] for name in names}
+    row = Post.objects.filter(pk=post_id).values(
+        *dict.fromkeys(lookups.values())
+    ).first()
+    if row is None:
+        return _error('пост не найден', 404)
+    return _response(_serialize(row, lookups))
+
+
+@api_view
+@replica_reads
+@conditional(post_validators)
+def post_comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        return _error('пост не найден', 404)
+    return _page(request, queries.post_comments(post_id), COMMENT_FIELDS)
+
+
+@api_view
+def group_list(request):
+    names = _fields(request, dict.fromkeys(GROUP_FIELDS))
+    return _response({'results': [
+        {name: getattr(group, name) for name in names}
+        for group in groups.all_groups()
+    ]})
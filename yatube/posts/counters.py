@@ -0,0 +1,147 @@
+"""Денормализованные счётчики: посты и подписчики автора, посты группы,
+комментарии поста.
+
+Счётчики меняются атомарно через F()-выражения из сигналов posts.signals.
+Строка AuthorStats создаётся лениво и тогда считается с нуля. Если
+bump_author() с приращением не нашёл строки, он создаёт её сам: подсчёт
+идёт в той же транзакции, что и изменение, и уже его учитывает. Если
+строку успел создать другой запрос, его подсчёт нашего незакоммиченного
+изменения не видел, и тогда применяется F()-приращение. Уменьшение без
+строки ничего не делает: так бывает при удалении самого автора. Если же
+оно совпало с чужим ленивым созданием строки, счётчик поправит
+recount_counters.
+
+Число записей для постраничной навигации хранится в кеше по области
+(см. posts.versions) и сбрасывается вместе с её версией: сразу и ещё раз
+после коммита.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from posts.models import AuthorStats, Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+def _stats_values(author_id):
+    followers_count = Follow.objects.filter(author_id=author_id).count()
+    return {
+        'posts_count': Post.objects.filter(author_id=author_id).count(),
+        'followers_count': followers_count,
+        'popular': followers_count > settings.FEED_FANOUT_LIMIT,
+    }
+
+
+def _create_stats(author_id):
+    """Создать строку AuthorStats с нуля; None, если её создал другой."""
+    try:
+        with transaction.atomic():
+            return AuthorStats.objects.create(
+                user_id=author_id, **_stats_values(author_id)
+            )
+    except IntegrityError:
+        return None
+
+
+def author_stats(author_id):
+    """Строка AuthorStats автора; при отсутствии пересчитывается с нуля."""
+    try:
+        return AuthorStats.objects.get(user_id=author_id)
+    except AuthorStats.DoesNotExist:
+        pass
+    return (_create_stats(author_id)
+            or AuthorStats.objects.get(user_id=author_id))
+
+
+def stats_of(author):
+    """AuthorStats автора, загруженная через select_related('stats')."""
+    try:
+        return author.stats
+    except AuthorStats.DoesNotExist:
+        author.stats = author_stats(author.pk)
+        return author.stats
+
+
+def bump_author(author_id, **deltas):
+    stats = AuthorStats.objects.filter(user_id=author_id)
+    values = {name: F(name) + delta for name, delta in deltas.items()}
+    if stats.update(**values):
+        return
+    # Уменьшать в отсутствующей строке нечего: её, возможно, уже снёс
+    # каскад удаления самого автора, и создавать её заново нельзя.
+    if (all(delta > 0 for delta in deltas.values())
+            and User.objects.filter(pk=author_id).exists()
+            and _create_stats(author_id) is None):
+        stats.update(**values)
+
+
+def bump_group(group_id, delta):
+    if group_id is not None:
+        Group.objects.filter(pk=group_id).update(
+            posts_count=F('posts_count') + delta
+        )
+
+
+def bump_comments(post_id, delta):
+    """Изменить число комментариев и отметить пост изменённым: список
+    комментариев входит в страницу поста, а updated_at — в её
+    Last-Modified."""
+    Post.objects.filter(pk=post_id).update(
+        comments_count=F('comments_count') + delta,
+        updated_at=timezone.now(),
+    )
+
+
+def _count(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(n=Count('pk')).values('n')
+    ), 0)
+
+
+def recount(authors=None, groups=None, posts=None):
+    """Пересчитать счётчики с нуля.
+
+    Аргументы ограничивают пересчёт списками id; None — пересчитать всё.
+    """
+    stats = AuthorStats.objects.all()
+    if authors is not None:
+        stats = stats.filter(user_id__in=authors)
+    stats.update(
+        posts_count=_count(Post, 'author'),
+        followers_count=_count(Follow, 'author'),
+    )
+    group_list = Group.objects.all()
+    if groups is not None:
+        group_list = group_list.filter(pk__in=groups)
+    group_list.update(posts_count=_count(Post, 'group'))
+    post_list = Post.objects.all()
+    if posts is not None:
+        post_list = post_list.filter(pk__in=posts)
+    post_list.update(comments_count=_count(Comment, 'post'))
+
+
+PAGE_COUNT_KEY = 'page-count:{}'
+
+
+def page_count(scope, queryset, timeout=None):
+    """Число записей queryset из кеша области scope."""
+    return cache.get_or_set(PAGE_COUNT_KEY.format(scope), queryset.count,
+                            timeout)
+
+
+def forget_page_counts(scopes):
+    """Сбросить числа сразу и ещё раз после коммита (см. core.pagecache).
+
+    Числа хранятся без срока, поэтому запрос, посчитавший записи до
+    коммита, иначе оставил бы старое число навсегда.
+    """
+    keys = [PAGE_COUNT_KEY.format(scope) for scope in scopes]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,77 @@
+"""Потоковая выгрузка таблиц Post, Comment, Follow и Group.
+
+Строки читаются keyset-пачками по первичному ключу, поэтому память не
+растёт с размером таблицы, а каждая пачка — один запрос по индексу
+первичного ключа, без OFFSET. Генераторы отдают готовые строки JSONL
+или CSV и годятся и для файла, и для StreamingHttpResponse.
+"""
+import csv
+import datetime
+import json
+
+from posts.models import Comment, Follow, Group, Post
+
+CHUNK_SIZE = 2000
+
+TABLES = {
+    'posts': (Post, ('id', 'text', 'pub_date', 'updated_at', 'author_id',
+                     'group_id', 'image', 'comments_count')),
+    'comments': (Comment, ('id', 'post_id', 'author_id', 'text',
+                           'created')),
+    'follows': (Follow, ('id', 'user_id', 'author_id')),
+    'groups': (Group, ('id', 'title', 'slug', 'description',
+                       'posts_count')),
+}
+
+FORMATS = ('jsonl', 'csv')
+
+
+def _plain(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+def rows(table, chunk_size=CHUNK_SIZE):
+    """Кортежи значений полей TABLES[table] в порядке первичного ключа."""
+    model, fields = TABLES[table]
+    queryset = model.objects.order_by('pk').values_list(*fields)
+    last = None
+    while True:
+        chunk = queryset if last is None else queryset.filter(pk__gt=last)
+        count = 0
+        for row in chunk[:chunk_size].iterator(chunk_size=chunk_size):
+            count += 1
+            last = row[0]
+            yield row
+        if count < chunk_size:
+            return
+
+
+class _Echo:
+    """Буфер для csv.writer, который просто возвращает записанное."""
+
+    def write(self, value):
+        return value
+
+
+def jsonl_lines(table, chunk_size=CHUNK_SIZE):
+    _, fields = TABLES[table]
+    for row in rows(table, chunk_size):
+        yield json.dumps(
+            dict(zip(fields, map(_plain, row))), ensure_ascii=False
+        ) + '\n'
+
+
+def csv_lines(table, chunk_size=CHUNK_SIZE):
+    _, fields = TABLES[table]
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows(table, chunk_size):
+        yield writer.writerow(map(_plain, row))
+
+
+def lines(table, file_format, chunk_size=CHUNK_SIZE):
+    if file_format == 'csv':
+        return csv_lines(table, chunk_size)
+    return jsonl_lines(table, chunk_size)
@@ -0,0 +1,188 @@
+"""Материализованная лента подписок (fan-out on write).
+
+Новый пост сразу раскладывается в FeedEntry всем подписчикам автора,
+поэтому follow_index читает готовую ленту, а не соединяет Post с Follow.
+У популярных авторов (AuthorStats.popular) посты не раскладываются: их
+лента подтягивает при чтении (hybrid pull).
+
+Популярным автор становится, как только подписчиков больше
+FEED_FANOUT_LIMIT, а обратно — только в settle_popular() (команда
+rebuild_feeds) и когда их не больше FEED_FANOUT_LIMIT - FEED_FANOUT_MARGIN.
+Возврат к раскладке дозаполняет ленты всех подписчиков всеми постами
+автора: такой работе не место в запросе отписки, и подписки-отписки на
+границе не должны её повторять.
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import Q
+
+from posts.counters import author_stats, bump_author, recount
+from posts.models import AuthorStats, FeedEntry, Follow, Post
+
+BATCH_SIZE = 1000
+
+
+def _fanout_limit():
+    return settings.FEED_FANOUT_LIMIT
+
+
+def is_popular(author_id):
+    return author_stats(author_id).popular
+
+
+def check_popular(author_id):
+    """is_popular(), но сначала отметить автора популярным, если
+    подписчиков у него стало больше FEED_FANOUT_LIMIT."""
+    stats = author_stats(author_id)
+    if not stats.popular and stats.followers_count > _fanout_limit():
+        AuthorStats.objects.filter(user_id=author_id).update(popular=True)
+        return True
+    return stats.popular
+
+
+def _insert(entries, batch_size=BATCH_SIZE):
+    """Вставить записи пачками по batch_size, не собирая их все в памяти.
+
+    Пачку bulk_create() ещё дробит до предела параметров бэкенда: SQLite
+    не принимает в одном INSERT больше нескольких сотен строк.
+    """
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, batch_size))
+        if not batch:
+            return
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out_post(post):
+    """Разложить пост в ленты всех подписчиков автора."""
+    if is_popular(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _insert(
+        FeedEntry(user_id=user_id, post_id=post.pk, pub_date=post.pub_date)
+        for user_id in followers.iterator()
+    )
+
+
+def refan_post(post):
+    """Переложить пост после смены автора."""
+    FeedEntry.objects.filter(post_id=post.pk).delete()
+    fan_out_post(post)
+
+
+def backfill(user_id, author_id, batch_size=BATCH_SIZE):
+    """Добавить в ленту пользователя все посты автора."""
+    posts = Post.objects.filter(
+        author_id=author_id
+    ).values_list('pk', 'pub_date')
+    _insert(
+        (FeedEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+         for pk, pub_date in posts.iterator()),
+        batch_size=batch_size,
+    )
+
+
+def drop(user_id, author_id):
+    """Убрать из ленты пользователя посты автора."""
+    FeedEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def fan_out_author(author_id, batch_size=BATCH_SIZE):
+    """Разложить все посты автора всем его подписчикам."""
+    followers = Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True)
+    for user_id in followers.iterator():
+        backfill(user_id, author_id, batch_size=batch_size)
+
+
+def follow_added(follow):
+    bump_author(follow.author_id, followers_count=1)
+    if not check_popular(follow.author_id):
+        backfill(follow.user_id, follow.author_id)
+
+
+def follow_removed(follow):
+    bump_author(follow.author_id, followers_count=-1)
+    drop(follow.user_id, follow.author_id)
+
+
+def settle_popular(author_ids=None, batch_size=BATCH_SIZE):
+    """Обновить AuthorStats.popular по числу подписчиков.
+
+    Авторов, которые вернулись к раскладке, разложить всем подписчикам;
+    возвращает их id. ``author_ids`` ограничивает проверку.
+    """
+    stats = AuthorStats.objects.all()
+    if author_ids is not None:
+        stats = stats.filter(user_id__in=author_ids)
+    stats.filter(
+        popular=False, followers_count__gt=_fanout_limit()
+    ).update(popular=True)
+    returned = set(stats.filter(
+        popular=True,
+        followers_count__lte=_fanout_limit() - settings.FEED_FANOUT_MARGIN,
+    ).values_list('user_id', flat=True))
+    for author_id in returned:
+        # Флаг снимается до раскладки, чтобы новые посты автора уже
+        # раскладывались; повторы отсечёт ignore_conflicts.
+        AuthorStats.objects.filter(user_id=author_id).update(popular=False)
+        fan_out_author(author_id, batch_size=batch_size)
+    return returned
+
+
+def feed_for(user):
+    """Лента подписок пользователя для пагинации.
+
+    Пока среди авторов нет популярных, это FeedEntry, упорядоченные по
+    индексу (user, -pub_date, -post); иначе — посты с подтягиванием
+    популярных авторов. В обоих случаях as_posts() даёт те же посты в том
+    же порядке, что и ``Post.objects.filter(author__following__user=user)``.
+    """
+    popular = list(Follow.objects.filter(
+        user=user, author__stats__popular=True,
+    ).values_list('author_id', flat=True))
+    if not popular:
+        return FeedEntry.objects.filter(user=user).select_related(
+            'post__author'
+        )
+    return Post.objects.select_related('author').filter(
+        Q(pk__in=FeedEntry.objects.filter(user=user).values('post_id'))
+        | Q(author_id__in=popular)
+    )
+
+
+def as_posts(items):
+    return [
+        item.post if isinstance(item, FeedEntry) else item for item in items
+    ]
+
+
+def rebuild(users=None, batch_size=BATCH_SIZE):
+    """Пересобрать ленты и счётчики подписчиков с нуля.
+
+    Без ``users`` пересобираются ленты всех пользователей. Заодно
+    обновляется популярность их авторов (см. settle_popular).
+    """
+    follows = Follow.objects.all()
+    if users is not None:
+        follows = follows.filter(user__in=users)
+    author_ids = set(follows.values_list('author_id', flat=True))
+    for author_id in author_ids:
+        author_stats(author_id)
+    recount(authors=author_ids, groups=(), posts=())
+    entries = FeedEntry.objects.all()
+    if users is not None:
+        entries = entries.filter(user__in=users)
+    entries.delete()
+    for user_id, author_id in follows.values_list('user_id', 'author_id'):
+        if not is_popular(author_id):
+            backfill(user_id, author_id, batch_size=batch_size)
+    settle_popular(None if users is None else author_ids,
+                   batch_size=batch_size)
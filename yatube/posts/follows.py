@@ -0,0 +1,93 @@
+"""Подписки пользователя: кешированное множество авторов и массовые операции.
+
+following_ids() отдаёт id всех авторов, на которых подписан пользователь,
+из кеша: по нему profile и ленты показывают состояние подписки без
+запроса. Кеш сбрасывается сигналами Follow и функциями этого модуля.
+
+follow() создаёт подписки одним bulk_create(ignore_conflicts=True):
+уникальное ограничение unique_following само отсекает повторы, в том
+числе при гонке двух запросов. Новые подписки считаются в той же
+транзакции, что и вставка. На PostgreSQL и MySQL select_for_update() по
+строке пользователя выстраивает его параллельные follow() в очередь, и
+одну подписку новой оба не посчитают. SQLite FOR UPDATE не знает, и
+Django его опускает: там пишет одна транзакция на всю базу, и та, что
+прочитала подписки до чужого коммита, при вставке получит ошибку
+блокировки (database is locked) и откатится, а не ответит тем же
+списком. bulk_create не отправляет сигналов, поэтому счётчики, ленты и
+версии обновляются здесь же; счётчики пересчитываются с нуля, чтобы
+гонка не посчитала подписку дважды.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+
+from posts import counters, feeds, versions
+from posts.models import Follow
+
+User = get_user_model()
+
+KEY = 'follows:{}'
+TIMEOUT = 24 * 60 * 60
+
+# Сколько авторов можно передать в одном запросе follow_bulk.
+BULK_LIMIT = 500
+
+
+def following_ids(user):
+    """frozenset id авторов, на которых подписан пользователь."""
+    if not user.is_authenticated:
+        return frozenset()
+    ids = cache.get_or_set(
+        KEY.format(user.pk),
+        lambda: tuple(sorted(Follow.objects.filter(user=user).values_list(
+            'author_id', flat=True
+        ))),
+        TIMEOUT,
+    )
+    return frozenset(ids)
+
+
+def invalidate(user_id):
+    """Сбросить кеш сразу и ещё раз после коммита (см. posts.groups)."""
+    key = KEY.format(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def follow(user, author_ids):
+    """Подписать пользователя на авторов; возвращает id новых подписок."""
+    author_ids = set(author_ids) - {user.pk}
+    existing = Follow.objects.filter(user=user, author_id__in=author_ids)
+    if not author_ids or set(
+        existing.values_list('author_id', flat=True)
+    ) >= author_ids:
+        return set()
+    with transaction.atomic():
+        # На SQLite это обычный SELECT, см. описание модуля.
+        User.objects.select_for_update().get(pk=user.pk)
+        new = author_ids - set(existing.values_list('author_id', flat=True))
+        Follow.objects.bulk_create(
+            [Follow(user=user, author_id=author_id) for author_id in new],
+            ignore_conflicts=True,
+        )
+        counters.recount(authors=new, groups=(), posts=())
+        for author_id in new:
+            if not feeds.check_popular(author_id):
+                feeds.backfill(user.pk, author_id)
+        versions.bump(versions.follower_scope(user.pk),
+                      *map(versions.author_scope, new))
+    invalidate(user.pk)
+    return new
+
+
+def unfollow(user, author_ids):
+    """Отписать пользователя от авторов; возвращает id снятых подписок.
+
+    delete() отправляет post_delete для каждой строки, так что ленты,
+    счётчики и кеш обновляют сигналы.
+    """
+    follows = Follow.objects.filter(user=user, author_id__in=set(author_ids))
+    removed = set(follows.values_list('author_id', flat=True))
+    if removed:
+        follows.delete()
+    return removed
@@ -1,8 +1,25 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
+from django.forms.models import ModelChoiceIterator
 
+from . import groups, uploads
 from .models import Comment, Follow, Post
 
 
+class GroupChoiceIterator(ModelChoiceIterator):
+    """Варианты выбора группы из реестра posts.groups, без запроса."""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for group in groups.all_groups():
+            yield self.choice(group)
+
+    def __len__(self):
+        return (len(groups.all_groups())
+                + (self.field.empty_label is not None))
+
+
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
@@ -13,6 +30,26 @@ class PostForm(forms.ModelForm):
             'group': forms.Select(attrs={'class': 'form-control'})
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        group = self.fields['group']
+        group.iterator = GroupChoiceIterator
+        group.widget.choices = group.choices
+
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if isinstance(image, UploadedFile):
+            uploads.validate(image)
+        return image
+
+    def save(self, commit=True):
+        # Новая картинка сохраняется под именем из хеша содержимого;
+        # перекодирует её фоновый пул (см. posts.uploads).
+        image = self.cleaned_data.get('image')
+        if isinstance(image, UploadedFile):
+            self.instance.image = uploads.store(image)
+        return super().save(commit)
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,109 @@
+"""Реестр групп: все группы в памяти процесса.
+
+Групп мало, и меняются они редко, а нужны почти каждой странице: slug
+для group_list, название и slug в ленте, список в форме поста. Снимок
+таблицы (без posts_count, который меняется с каждым постом) хранится в
+общем кеше под ключом поколения и копируется в память процесса. Каждое
+обращение сверяет только номер поколения в кеше; сигналы Group (см.
+posts.signals) выпускают новое поколение, и все процессы перечитывают
+снимок при следующем обращении.
+
+QuerySet.update() сигналов не отправляет: после массовых правок групп
+нужно вызвать invalidate() вручную.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from posts.models import Group
+
+GENERATION_KEY = 'groups:generation'
+SNAPSHOT_KEY = 'groups:snapshot:{}'
+FIELDS = ('pk', 'slug', 'title', 'description')
+# Снимки старых поколений не нужны: пусть кеш выбросит их сам.
+SNAPSHOT_TIMEOUT = 24 * 60 * 60
+
+_local = {'generation': None}
+
+
+def _generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, uuid.uuid4().hex, None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def _build(generation, rows):
+    groups = []
+    for row in rows:
+        group = Group(**dict(zip(FIELDS, row)))
+        group._state.adding = False
+        group._state.db = DEFAULT_DB_ALIAS
+        groups.append(group)
+    return {
+        'generation': generation,
+        'ordered': groups,
+        'by_pk': {group.pk: group for group in groups},
+        'by_slug': {group.slug: group for group in groups},
+    }
+
+
+def _registry():
+    global _local
+    generation = _generation()
+    if _local['generation'] != generation:
+        # Порядок — Group.Meta.ordering, как и в форме поста.
+        rows = cache.get_or_set(
+            SNAPSHOT_KEY.format(generation),
+            lambda: list(Group.objects.values_list(*FIELDS)),
+            SNAPSHOT_TIMEOUT,
+        )
+        _local = _build(generation, rows)
+    return _local
+
+
+def invalidate():
+    """Выпустить новое поколение реестра.
+
+    Поколение меняется сразу, чтобы этот же процесс увидел изменения, и
+    ещё раз после коммита: иначе другой процесс мог бы успеть положить
+    в кеш снимок, прочитанный до коммита.
+    """
+    global _local
+
+    def new_generation():
+        cache.set(GENERATION_KEY, uuid.uuid4().hex, None)
+
+    new_generation()
+    transaction.on_commit(new_generation)
+    _local = {'generation': None}
+
+
+def all_groups():
+    """Все группы в порядке Group.Meta.ordering."""
+    return _registry()['ordered']
+
+
+def by_slug(slug):
+    return _registry()['by_slug'].get(slug)
+
+
+def by_pk(pk):
+    return _registry()['by_pk'].get(pk)
+
+
+def attach(posts):
+    """Подставить постам группы из реестра вместо select_related('group').
+
+    Возвращает список постов.
+    """
+    registry = _registry()['by_pk']
+    posts = list(posts)
+    for post in posts:
+        if post.group_id is not None:
+            group = registry.get(post.group_id)
+            if group is not None:
+                post.group = group
+    return posts
@@ -0,0 +1,57 @@
+import gzip
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+
+
+class Command(BaseCommand):
+    help = ('Выгружает посты, комментарии, подписки и группы в JSONL или '
+            'CSV, по файлу на таблицу')
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Каталог для файлов выгрузки')
+        parser.add_argument(
+            'tables', nargs='*',
+            help='Какие таблицы выгрузить: '
+                 f'{", ".join(export.TABLES)} (по умолчанию — все)'
+        )
+        parser.add_argument(
+            '--format', choices=export.FORMATS, default='jsonl',
+        )
+        parser.add_argument(
+            '--gzip', action='store_true', help='Сжимать файлы gzip'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=export.CHUNK_SIZE,
+            help='Сколько строк читать из БД одним запросом'
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options['tables']) - set(export.TABLES)
+        if unknown:
+            raise CommandError(
+                f'Неизвестные таблицы: {", ".join(sorted(unknown))}'
+            )
+        os.makedirs(options['output'], exist_ok=True)
+        for table in options['tables'] or export.TABLES:
+            name = f'{table}.{options["format"]}'
+            if options['gzip']:
+                name += '.gz'
+            path = os.path.join(options['output'], name)
+            opener = gzip.open if options['gzip'] else open
+            started = time.monotonic()
+            written = 0
+            with opener(path, 'wt', encoding='utf-8', newline='') as file:
+                for line in export.lines(table, options['format'],
+                                         options['chunk_size']):
+                    file.write(line)
+                    written += 1
+            if options['format'] == 'csv':
+                written -= 1
+            self.stdout.write(
+                f'{path}: {written} строк за '
+                f'{time.monotonic() - started:.1f} с'
+            )
@@ -0,0 +1,62 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.models import Post
+from posts.thumbnails import prepare
+
+
+def _generate(post_id):
+    try:
+        # Заодно перекодируются загрузки, до которых не дошёл фоновый пул.
+        return prepare(post_id)
+    except Exception:
+        return None
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Создаёт миниатюры для уже загруженных картинок постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.THUMBNAIL_WORKERS,
+            help='Сколько миниатюр создавать параллельно'
+        )
+        parser.add_argument(
+            '--processes', action='store_true',
+            help='Использовать пул процессов вместо пула потоков'
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Пересоздать миниатюры и у постов, где они уже есть'
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='')
+        if not options['force']:
+            posts = posts.filter(thumbnails='')
+        post_ids = list(posts.values_list('pk', flat=True))
+        if options['processes']:
+            # Дочерние процессы не должны унаследовать открытые соединения.
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=options['workers'])
+        else:
+            pool = ThreadPoolExecutor(max_workers=options['workers'])
+        started = time.monotonic()
+        done = failed = 0
+        with pool:
+            for result in pool.map(_generate, post_ids, chunksize=16):
+                if result is None:
+                    failed += 1
+                else:
+                    done += 1
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Миниатюры созданы для {done} постов, пропущено {failed}, '
+            f'{elapsed:.1f} с'
+        ))
@@ -0,0 +1,196 @@
+import csv
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from posts import counters, feeds, rendering, versions
+from posts.models import Group, Post
+
+User = get_user_model()
+
+# SQLite не принимает больше 999 параметров в одном запросе.
+LOOKUP_CHUNK = 500
+
+
+class Reject(Exception):
+    pass
+
+
+def read_jsonl(stream):
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            yield line_number, None, f'битый JSON: {error}'
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, 'строка должна быть JSON-объектом'
+            continue
+        yield line_number, row, None
+
+
+def read_csv(stream):
+    for line_number, row in enumerate(csv.DictReader(stream), 2):
+        yield line_number, row, None
+
+
+class Command(BaseCommand):
+    help = ('Импортирует посты из JSONL или CSV с полями text, author '
+            '(username) и group (slug, необязательно)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл для импорта или - для stdin')
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'),
+            help='Формат файла; по умолчанию определяется по расширению'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько строк вставлять одним INSERT'
+        )
+        parser.add_argument(
+            '--transaction-size', type=int, default=20000,
+            help='Сколько строк коммитить одной транзакцией'
+        )
+        parser.add_argument(
+            '--rejects',
+            help='Куда записать отклонённые строки (JSONL с причиной)'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or (
+            'csv' if path.lower().endswith('.csv') else 'jsonl'
+        )
+        if path != '-' and not os.path.exists(path):
+            raise CommandError(f'Файл {path} не найден')
+        self.authors = {}
+        self.groups = {}
+        self.author_ids = set()
+        self.group_ids = set()
+        self.inserted = self.rejected = 0
+        self.rejects = (open(options['rejects'], 'w', encoding='utf-8')
+                        if options['rejects'] else None)
+        self.batch_size = min(
+            options['batch_size'],
+            connection.ops.bulk_batch_size(
+                [field for field in Post._meta.concrete_fields
+                 if not field.primary_key],
+                [],
+            ) or options['batch_size'],
+        )
+        stream = (sys.stdin if path == '-'
+                  else open(path, encoding='utf-8', newline=''))
+        reader = read_csv if file_format == 'csv' else read_jsonl
+        started = time.monotonic()
+        try:
+            rows = reader(stream)
+            while True:
+                chunk = list(islice(rows, options['transaction_size']))
+                if not chunk:
+                    break
+                self._import_chunk(chunk)
+                if options['verbosity'] > 1:
+                    self._report(started, ending='\r')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            if self.rejects:
+                self.rejects.close()
+        self._refresh_denormalized()
+        self._report(started)
+
+    def _resolve(self, cache, model, field, keys):
+        missing = [key for key in set(keys) if key not in cache]
+        for start in range(0, len(missing), LOOKUP_CHUNK):
+            part = missing[start:start + LOOKUP_CHUNK]
+            found = dict(model.objects.filter(
+                **{f'{field}__in': part}
+            ).values_list(field, 'pk'))
+            for key in part:
+                cache[key] = found.get(key)
+
+    def _import_chunk(self, chunk):
+        rows = [row for _, row, error in chunk if not error]
+        self._resolve(self.authors, User, 'username',
+                      [str(row.get('author') or '') for row in rows])
+        self._resolve(self.groups, Group, 'slug',
+                      [str(row['group']) for row in rows
+                       if row.get('group')])
+        posts = []
+        for number, row, error in chunk:
+            try:
+                if error:
+                    raise Reject(error)
+                posts.append(self._build(row))
+            except Reject as error:
+                self._reject(number, row, str(error))
+        with transaction.atomic():
+            Post.objects.bulk_create(posts, batch_size=self.batch_size)
+        self.inserted += len(posts)
+
+    def _build(self, row):
+        text = row.get('text')
+        if not isinstance(text, str) or not text.strip():
+            raise Reject('пустой text')
+        author_id = self.authors.get(str(row.get('author') or ''))
+        if author_id is None:
+            raise Reject(f'автор {row.get("author")!r} не найден')
+        group_id = None
+        if row.get('group'):
+            group_id = self.groups.get(str(row['group']))
+            if group_id is None:
+                raise Reject(f'группа {row["group"]!r} не найдена')
+        self.author_ids.add(author_id)
+        if group_id is not None:
+            self.group_ids.add(group_id)
+        # bulk_create() не вызывает Post.save(): анонс и HTML считаются
+        # здесь.
+        return Post(text=text, author_id=author_id, group_id=group_id,
+                    **rendering.render(text))
+
+    def _reject(self, number, row, reason):
+        self.rejected += 1
+        if self.rejects:
+            self.rejects.write(json.dumps(
+                {'line': number, 'reason': reason, 'row': row},
+                ensure_ascii=False
+            ) + '\n')
+
+    def _refresh_denormalized(self):
+        # bulk_create не отправляет сигналы: счётчики и ленты подписок
+        # обновляются один раз для всех затронутых авторов и групп.
+        author_ids = sorted(self.author_ids)
+        group_ids = sorted(self.group_ids)
+        for start in range(0, max(len(author_ids), len(group_ids)),
+                           LOOKUP_CHUNK):
+            counters.recount(
+                authors=author_ids[start:start + LOOKUP_CHUNK],
+                groups=group_ids[start:start + LOOKUP_CHUNK],
+                posts=(),
+            )
+            versions.bump(*map(versions.author_scope,
+                               author_ids[start:start + LOOKUP_CHUNK]))
+            versions.bump(*map(versions.group_scope,
+                               group_ids[start:start + LOOKUP_CHUNK]))
+        versions.bump(versions.GLOBAL)
+        for author_id in author_ids:
+            if not feeds.is_popular(author_id):
+                feeds.fan_out_author(author_id)
+
+    def _report(self, started, ending='\n'):
+        elapsed = time.monotonic() - started
+        rate = self.inserted / elapsed if elapsed else 0
+        self.stdout.write(
+            f'Импортировано {self.inserted}, отклонено {self.rejected}, '
+            f'{elapsed:.1f} с, {rate:.0f} строк/с',
+            ending=ending
+        )
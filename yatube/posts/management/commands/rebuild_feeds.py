@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import feeds
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает материализованные ленты подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames', nargs='*',
+            help='Пересобрать ленты только этих пользователей'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=feeds.BATCH_SIZE,
+            help='Размер пачки для bulk_create'
+        )
+        parser.add_argument(
+            '--popular', action='store_true',
+            help='Только обновить популярность авторов и разложить посты '
+                 'тех, кто перестал быть популярным (для запуска по '
+                 'расписанию)'
+        )
+
+    def handle(self, *args, **options):
+        if options['popular']:
+            returned = feeds.settle_popular(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Вернулись к раскладке авторов: {len(returned)}'
+            ))
+            return
+        users = None
+        if options['usernames']:
+            users = list(User.objects.filter(
+                username__in=options['usernames']
+            ))
+            missing = set(options['usernames']) - {
+                user.username for user in users
+            }
+            if missing:
+                raise CommandError(
+                    f'Пользователи не найдены: {", ".join(sorted(missing))}'
+                )
+        feeds.rebuild(users, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS('Ленты подписок пересобраны'))
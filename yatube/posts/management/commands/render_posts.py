@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from posts import rendering, versions
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает анонсы и HTML статей со старой версией '
+            'rendering.HTML_VERSION или сохранённых в обход Post.save() '
+            '(bulk_create, update)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересчитать все статьи, а не только со старой версией'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько статей читать и обновлять за раз'
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.order_by('pk')
+        if not options['all']:
+            posts = posts.exclude(html_version=rendering.HTML_VERSION)
+        rows = posts.values_list('pk', 'text', 'author_id', 'group_id',
+                                 *rendering.FIELDS)
+        last_pk = 0
+        changed = 0
+        while True:
+            batch = list(rows.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+            changed += self._update(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f'Перерисовано статей: {changed}'
+        ))
+
+    def _update(self, batch):
+        # updated_at меняется, чтобы кеш карточек в лентах (ключ по
+        # updated_at) не отдавал старый HTML; ETag страниц — по версиям.
+        now = timezone.now()
+        posts = []
+        scopes = set()
+        for pk, text, author_id, group_id, *stored in batch:
+            rendered = rendering.render(text)
+            if list(rendered.values()) != stored:
+                posts.append(Post(pk=pk, updated_at=now, **rendered))
+                scopes.update(versions.post_scopes(author_id, group_id))
+        if posts:
+            with transaction.atomic():
+                Post.objects.bulk_update(
+                    posts, [*rendering.FIELDS, 'updated_at']
+                )
+                versions.bump(*scopes)
+        return len(posts)
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.16 on 2026-10-18 16:32
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_auto_20230425_0211'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='post',
+            options={'ordering': ('-pub_date', '-id'), 'verbose_name': 'Статья', 'verbose_name_plural': 'Статьи'},
+        ),
+    ]
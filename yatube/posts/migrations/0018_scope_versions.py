@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-18 16:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_comment_created'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScopeVersion',
+            fields=[
+                ('scope', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='Область')),
+                ('version', models.PositiveIntegerField(default=0, verbose_name='Версия')),
+                ('changed_at', models.DateTimeField(verbose_name='Время изменения')),
+            ],
+            options={
+                'verbose_name': 'Версия области',
+                'verbose_name_plural': 'Версии областей',
+            },
+        ),
+    ]
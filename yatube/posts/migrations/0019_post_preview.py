@@ -0,0 +1,49 @@
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+PREVIEW_LENGTH = 500
+
+
+def make_preview(text, length=PREVIEW_LENGTH):
+    # Копия make_preview на момент миграции: код приложения может
+    # измениться, а миграция должна считать анонс так, как тогда.
+    text = text.strip()
+    if len(text) <= length:
+        return text
+    cut = text[:length]
+    if not text[length].isspace():
+        head, space, _ = cut.rpartition(' ')
+        if space and head.strip():
+            cut = head
+    return cut.rstrip(' \t\r\n,.;:-—') + '…'
+
+
+def fill_preview(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    rows = Post.objects.order_by('pk').values_list('pk', 'text')
+    last_pk = 0
+    while True:
+        batch = list(rows.filter(pk__gt=last_pk)[:BATCH_SIZE])
+        if not batch:
+            break
+        Post.objects.bulk_update(
+            [Post(pk=pk, preview=make_preview(text)) for pk, text in batch],
+            ['preview'],
+        )
+        last_pk = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_scope_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='preview',
+            field=models.TextField(blank=True, editable=False, help_text='Начало текста для лент, заполняется при сохранении', verbose_name='Анонс'),
+        ),
+        migrations.RunPython(fill_preview, migrations.RunPython.noop),
+    ]
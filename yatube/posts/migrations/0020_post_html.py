@@ -0,0 +1,58 @@
+from django.db import migrations, models
+from django.utils.html import escape
+from django.utils.text import normalize_newlines
+
+BATCH_SIZE = 500
+# Версия формата, который считает эта миграция; посты новых версий
+# пересчитывает команда render_posts.
+HTML_VERSION = 1
+
+
+def to_html(text):
+    # Копия rendering.to_html версии 1: экранирование и <br> вместо
+    # переводов строк, как {{ text|linebreaksbr }}.
+    return escape(normalize_newlines(text)).replace('\n', '<br>')
+
+
+def fill_html(apps, schema_editor):
+    # Анонс уже заполнила 0019_post_preview.
+    Post = apps.get_model('posts', 'Post')
+    rows = Post.objects.order_by('pk').values_list('pk', 'text', 'preview')
+    last_pk = 0
+    while True:
+        batch = list(rows.filter(pk__gt=last_pk)[:BATCH_SIZE])
+        if not batch:
+            break
+        Post.objects.bulk_update(
+            [Post(pk=pk, preview_html=to_html(preview),
+                  text_html=to_html(text), html_version=HTML_VERSION)
+             for pk, text, preview in batch],
+            ['preview_html', 'text_html', 'html_version'],
+        )
+        last_pk = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_post_preview'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='html_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='rendering.HTML_VERSION, с которой посчитан HTML', verbose_name='Версия HTML'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='preview_html',
+            field=models.TextField(blank=True, editable=False, help_text='Экранированный анонс с <br>, см. posts.rendering', verbose_name='HTML анонса'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, help_text='Экранированный текст с <br>, см. posts.rendering', verbose_name='HTML текста'),
+        ),
+        migrations.RunPython(fill_html, migrations.RunPython.noop),
+    ]
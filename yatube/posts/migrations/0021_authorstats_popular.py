@@ -0,0 +1,26 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_popular(apps, schema_editor):
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    limit = getattr(settings, 'FEED_FANOUT_LIMIT', 1000)
+    AuthorStats.objects.filter(followers_count__gt=limit).update(popular=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_post_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authorstats',
+            name='popular',
+            field=models.BooleanField(default=False, verbose_name='Посты подтягиваются в ленты при чтении'),
+        ),
+        migrations.RunPython(mark_popular, migrations.RunPython.noop),
+    ]
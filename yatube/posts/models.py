@@ -1,15 +1,22 @@
+import json
+
 from django.contrib.auth.models import User
 from django.db import models
 
+from posts import rendering
+
 
 class Post(models.Model):
     FIRST_FIFTEEN_CHARACTERS = 15
+    CARD_THUMBNAIL = '960x339'
     text = models.TextField(verbose_name='Текст статьи',
                             help_text='Введите текст статьи')
     pub_date = models.DateTimeField(auto_now_add=True,
                                     verbose_name='Дата публикации',
                                     help_text='Укажите дату '
                                               'публикации')
+    updated_at = models.DateTimeField(auto_now=True,
+                                      verbose_name='Дата изменения')
     author = models.ForeignKey(User, on_delete=models.CASCADE,
                                related_name='posts',
                                verbose_name='Автор статьи',
@@ -25,15 +32,86 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    thumbnails = models.TextField(
+        'Миниатюры',
+        blank=True,
+        editable=False,
+        help_text='JSON {геометрия: url}, заполняется posts.thumbnails'
+    )
+    comments_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0,
+        editable=False
+    )
+    preview = models.TextField(
+        'Анонс',
+        blank=True,
+        editable=False,
+        help_text='Начало текста для лент, заполняется при сохранении'
+    )
+    preview_html = models.TextField(
+        'HTML анонса',
+        blank=True,
+        editable=False,
+        help_text='Экранированный анонс с <br>, см. posts.rendering'
+    )
+    text_html = models.TextField(
+        'HTML текста',
+        blank=True,
+        editable=False,
+        help_text='Экранированный текст с <br>, см. posts.rendering'
+    )
+    html_version = models.PositiveSmallIntegerField(
+        'Версия HTML',
+        default=0,
+        editable=False,
+        help_text='rendering.HTML_VERSION, с которой посчитан HTML'
+    )
 
     class Meta:
         verbose_name = 'Статья'
         verbose_name_plural = 'Статьи'
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text
 
+    def save(self, *args, **kwargs):
+        # bulk_create() и update() сюда не попадают: такие посты
+        # дорисовывает команда render_posts.
+        for name, value in rendering.render(self.text).items():
+            setattr(self, name, value)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, *rendering.FIELDS}
+        super().save(*args, **kwargs)
+
+    @property
+    def thumbnail_urls(self):
+        try:
+            return json.loads(self.thumbnails)
+        except ValueError:
+            return {}
+
+    @property
+    def card_image_url(self):
+        """Миниатюра для ленты и страницы поста.
+
+        Пока фоновая генерация не закончилась, отдаётся оригинал.
+        """
+        if not self.image:
+            return None
+        return (self.thumbnail_urls.get(self.CARD_THUMBNAIL)
+                or self.image.url)
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200, verbose_name='Название группы',
@@ -42,6 +120,8 @@ class Group(models.Model):
                             help_text='Укажите порядковый номер группы')
     description = models.TextField(verbose_name='Описание группы',
                                    help_text='Добавьте текст описания группы')
+    posts_count = models.PositiveIntegerField('Число статей', default=0,
+                                              editable=False)
 
     class Meta:
         verbose_name = 'Группа статей'
@@ -67,6 +147,14 @@ class Comment(models.Model):
         'Текст комментария',
         help_text='Введите текст комментария'
     )
+    created = models.DateTimeField('Дата комментария', auto_now_add=True)
+
+    class Meta:
+        ordering = ('created', 'id')
+        indexes = [
+            models.Index(fields=['post', 'created', 'id'],
+                         name='comment_post_created_idx'),
+        ]
 
 
 class Follow(models.Model):
@@ -87,3 +175,91 @@ class Follow(models.Model):
                 fields=['author', 'user'], name='unique_following'
             )
         ]
+        indexes = [
+            models.Index(fields=['user', 'author'],
+                         name='follow_user_author_idx'),
+        ]
+
+
+class AuthorStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Автор'
+    )
+    posts_count = models.PositiveIntegerField(
+        'Число статей',
+        default=0
+    )
+    followers_count = models.PositiveIntegerField(
+        'Число подписчиков',
+        default=0
+    )
+    popular = models.BooleanField(
+        'Посты подтягиваются в ленты при чтении',
+        default=False
+    )
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        return str(self.user_id)
+
+
+class FeedEntry(models.Model):
+    """Запись материализованной ленты подписок follow_index.
+
+    pub_date дублирует Post.pub_date, чтобы ленту пользователя можно
+    было читать по индексу (user, -pub_date, -post) без сортировки.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        ordering = ('-pub_date', '-post_id')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_feed_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='feed_user_pub_date_idx'
+            )
+        ]
+
+
+class ScopeVersion(models.Model):
+    """Версия области данных для условных GET-запросов.
+
+    Область — вся лента ('posts'), группа ('group:<id>') или автор
+    ('author:<id>'). Сигналы posts.signals увеличивают версию при каждом
+    изменении, которое видно на страницах этой области; из версии и
+    времени изменения строятся ETag и Last-Modified.
+    """
+    scope = models.CharField('Область', max_length=64, primary_key=True)
+    version = models.PositiveIntegerField('Версия', default=0)
+    changed_at = models.DateTimeField('Время изменения')
+
+    class Meta:
+        verbose_name = 'Версия области'
+        verbose_name_plural = 'Версии областей'
+
+    def __str__(self):
+        return f'{self.scope} v{self.version}'
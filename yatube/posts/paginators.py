@@ -0,0 +1,250 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def _serialize(value):
+    # DjangoJSONEncoder обрезает микросекунды, а для курсора по pub_date
+    # нужна полная точность, иначе на границе страниц теряются записи.
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f'Cannot serialize {type(value).__name__} in cursor')
+
+
+class CursorPage(Sequence):
+    """Страница keyset-пагинации.
+
+    Повторяет ту часть интерфейса ``django.core.paginator.Page``,
+    которой пользуются шаблоны, но вместо номеров страниц хранит
+    непрозрачные курсоры на соседние страницы.
+    """
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None,
+                 paginator=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.paginator = paginator
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Keyset-пагинация (seek method) по упорядоченному набору полей.
+
+    Вместо ``COUNT(*)`` и ``OFFSET`` каждая страница выбирается условием
+    «строго после последней записи предыдущей страницы», поэтому
+    стоимость запроса не зависит от глубины листания. По умолчанию
+    используется порядок самого queryset (или Meta.ordering модели);
+    последнее поле ``ordering`` должно быть уникальным (обычно ``id``).
+    """
+
+    def __init__(self, object_list, per_page, ordering=None,
+                 count_cap=None):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        if ordering is None:
+            ordering = (object_list.query.order_by
+                        or object_list.model._meta.ordering)
+        self.ordering = tuple(ordering)
+        self.count_cap = count_cap
+
+    @property
+    def count(self):
+        """Число записей, но не больше ``count_cap + 1``.
+
+        Точный ``COUNT(*)`` по всей таблице не выполняется: подзапрос
+        ограничен ``LIMIT``, а при отключённом ``count_cap`` подсчёт
+        не делается вовсе.
+        """
+        if self.count_cap is None:
+            return None
+        if not hasattr(self, '_count'):
+            self._count = self.object_list.order_by()[
+                :self.count_cap + 1
+            ].count()
+        return self._count
+
+    @property
+    def count_is_capped(self):
+        return self.count is not None and self.count > self.count_cap
+
+    @property
+    def capped_count(self):
+        if self.count is None:
+            return None
+        return min(self.count, self.count_cap)
+
+    def get_page(self, cursor=None):
+        """Вернуть страницу по курсору; битый курсор означает первую."""
+        position = self.decode_cursor(cursor)
+        if position is None:
+            return self._forward_page(None)
+        direction, values = position
+        if direction == PREVIOUS:
+            return self._backward_page(values)
+        return self._forward_page(values)
+
+    def _forward_page(self, values):
+        queryset = self.object_list.order_by(*self.ordering)
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, reverse=False))
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        return CursorPage(
+            rows,
+            next_cursor=(self.encode_cursor(NEXT, rows[-1])
+                         if has_more else None),
+            previous_cursor=(self.encode_cursor(PREVIOUS, rows[0])
+                             if values is not None and rows else None),
+            paginator=self,
+        )
+
+    def _backward_page(self, values):
+        queryset = self.object_list.order_by(
+            *(self._flip(field) for field in self.ordering)
+        ).filter(self._seek(values, reverse=True))
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        if not rows:
+            return self._forward_page(None)
+        return CursorPage(
+            rows,
+            next_cursor=self.encode_cursor(NEXT, rows[-1]),
+            previous_cursor=(self.encode_cursor(PREVIOUS, rows[0])
+                             if has_more else None),
+            paginator=self,
+        )
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def _seek(self, values, reverse):
+        """Условие «строго после values» в порядке ``ordering``.
+
+        Для ``('-pub_date', '-id')`` получается
+        ``pub_date < d OR (pub_date = d AND id < i)``.
+        """
+        condition = Q()
+        for position, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            lookup = f'{name}__lt' if descending else f'{name}__gt'
+            equal = {
+                previous.lstrip('-'): value
+                for previous, value in zip(self.ordering[:position], values)
+            }
+            condition |= Q(**equal, **{lookup: values[position]})
+        return condition
+
+    def _key(self, row):
+        names = [field.lstrip('-') for field in self.ordering]
+        if isinstance(row, dict):
+            return [row[name] for name in names]
+        return [getattr(row, name) for name in names]
+
+    def encode_cursor(self, direction, row):
+        payload = json.dumps([direction, self._key(row)],
+                             default=_serialize, separators=(',', ':'))
+        token = base64.urlsafe_b64encode(payload.encode())
+        return token.decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None
+        try:
+            payload = base64.urlsafe_b64decode(
+                cursor + '=' * (-len(cursor) % 4)
+            )
+            direction, raw_values = json.loads(payload)
+        except (binascii.Error, ValueError, TypeError):
+            return None
+        if (direction not in (NEXT, PREVIOUS)
+                or not isinstance(raw_values, list)
+                or len(raw_values) != len(self.ordering)):
+            return None
+        model = self.object_list.model
+        try:
+            values = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, raw_values)
+            ]
+        except ValidationError:
+            return None
+        if any(value is None for value in values):
+            return None
+        return direction, values
+
+
+def elided_page_range(number, num_pages, on_each_side=2, on_ends=1):
+    """Номера страниц вокруг текущей и по краям; None — пропуск («…»).
+
+    Длина списка не зависит от num_pages: не больше
+    ``2 * (on_each_side + on_ends) + 3`` элементов.
+    """
+    if num_pages <= 2 * (on_each_side + on_ends) + 1:
+        return list(range(1, num_pages + 1))
+    window = range(max(1, number - on_each_side),
+                   min(num_pages, number + on_each_side) + 1)
+    pages = []
+    # Пропуск одной страницы заменять «…» незачем.
+    if window[0] > on_ends + 2:
+        pages += list(range(1, on_ends + 1)) + [None]
+    else:
+        pages += list(range(1, window[0]))
+    pages += list(window)
+    if window[-1] < num_pages - on_ends - 1:
+        pages += [None] + list(range(num_pages - on_ends + 1, num_pages + 1))
+    else:
+        pages += list(range(window[-1] + 1, num_pages + 1))
+    return pages
+
+
+class WindowPage(Page):
+    @property
+    def page_window(self):
+        return elided_page_range(self.number, self.paginator.num_pages)
+
+
+class CountedPaginator(Paginator):
+    """Постраничный Paginator с окном номеров страниц.
+
+    ``count`` можно передать заранее (например, из кеша), тогда
+    ``COUNT(*)`` не выполняется.
+    """
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            self.count = count
+
+    def _get_page(self, *args, **kwargs):
+        return WindowPage(*args, **kwargs)
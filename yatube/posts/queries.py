@@ -0,0 +1,61 @@
+"""Наборы данных страниц, общие для HTML (posts.views) и JSON API (posts.api).
+
+Здесь только фильтры и порядок: HTML-страницы сужают их через
+listing() до полей карточки поста, API — через values() с нужными
+полями, и обе стороны листают их одним CursorPaginator.
+"""
+from django.contrib.auth import get_user_model
+
+from posts import groups, versions
+from posts.feeds import feed_for
+from posts.models import Comment, FeedEntry, Post
+
+User = get_user_model()
+
+# Поля поста, которые показывает includes/post_item.html. Полный текст
+# в ленты не читается: он нужен только post_detail.
+LISTING_FIELDS = ('pub_date', 'updated_at', 'preview_html', 'image',
+                  'thumbnails', 'group', 'author', 'author__username')
+
+
+def index_posts():
+    return Post.objects.all()
+
+
+def group_posts(group):
+    return group.posts.all()
+
+
+def author_posts(author):
+    return author.posts.all()
+
+
+def feed_posts(user):
+    """Лента подписок: FeedEntry или Post, см. posts.feeds.feed_for."""
+    return feed_for(user)
+
+
+def listing(queryset):
+    """Набор для HTML-ленты: только поля карточки и автор одним JOIN."""
+    if queryset.model is FeedEntry:
+        return queryset.select_related('post__author').only(
+            'pub_date', 'post', *('post__' + name for name in LISTING_FIELDS)
+        )
+    return queryset.select_related('author').only(*LISTING_FIELDS)
+
+
+def post_comments(post_id):
+    return Comment.objects.filter(post_id=post_id)
+
+
+def scope_of_group(slug):
+    """Область версий группы по slug или None, если группы нет."""
+    group = groups.by_slug(slug)
+    return versions.group_scope(group.pk) if group is not None else None
+
+
+def scope_of_author(username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+    return versions.author_scope(author_id) if author_id is not None else None
@@ -0,0 +1,49 @@
+"""Тексты постов, подготовленные при записи: анонс и готовый HTML.
+
+Шаблоны выводят text_html и preview_html как есть, без linebreaksbr и
+экранирования на каждый показ. Всё, что зависит от текста, считает
+render(); Post.save() вызывает её при каждом сохранении. Если меняется
+формат (разметка, PREVIEW_LENGTH), нужно увеличить HTML_VERSION и
+запустить команду render_posts: она пересчитает посты со старой
+версией.
+"""
+from django.template.defaultfilters import linebreaksbr
+
+HTML_VERSION = 1
+
+# Длина анонса поста в лентах, в символах.
+PREVIEW_LENGTH = 500
+
+# Поля Post, которые заполняет render().
+FIELDS = ('preview', 'preview_html', 'text_html', 'html_version')
+
+
+def make_preview(text, length=PREVIEW_LENGTH):
+    """Начало текста для ленты: обрезается по границе слова, с «…»."""
+    text = text.strip()
+    if len(text) <= length:
+        return text
+    cut = text[:length]
+    # Слово, разрезанное на границе, отбрасывается целиком, если до него
+    # есть хоть один пробел.
+    if not text[length].isspace():
+        head, space, _ = cut.rpartition(' ')
+        if space and head.strip():
+            cut = head
+    return cut.rstrip(' \t\r\n,.;:-—') + '…'
+
+
+def to_html(text):
+    """То же, что {{ text|linebreaksbr }} в шаблоне с автоэкранированием."""
+    return str(linebreaksbr(text, autoescape=True))
+
+
+def render(text):
+    """Значения полей FIELDS для поста с таким текстом."""
+    preview = make_preview(text)
+    return {
+        'preview': preview,
+        'preview_html': to_html(preview),
+        'text_html': to_html(text),
+        'html_version': HTML_VERSION,
+    }
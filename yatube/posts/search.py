@@ -0,0 +1,220 @@
+"""Полнотекстовый поиск по Post.text на SQLite FTS5.
+
+posts_post_fts — FTS5-таблица с внешним содержимым (content='posts_post'):
+она хранит только индекс, а сам текст читает из posts_post. Индекс
+держат в актуальном состоянии триггеры, поэтому его не обходят ни
+bulk_create, ни update(). SQLite удаляет триггеры вместе с таблицей, а
+миграции Django пересоздают posts_post при каждом изменении схемы,
+поэтому install() повторяется после каждого migrate (см. PostsConfig).
+
+На других СУБД поиск откатывается к ``text__icontains``.
+"""
+import base64
+import binascii
+import json
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection as default_connection
+from django.db import connections, router
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from posts.models import Post
+from posts.paginators import NEXT, CursorPage, CursorPaginator
+
+User = get_user_model()
+
+TABLE = 'posts_post_fts'
+
+SCHEMA = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5(
+        text, content='posts_post', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS posts_post_fts_insert
+        AFTER INSERT ON posts_post BEGIN
+            INSERT INTO {TABLE}(rowid, text) VALUES (new.id, new.text);
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS posts_post_fts_delete
+        AFTER DELETE ON posts_post BEGIN
+            INSERT INTO {TABLE}({TABLE}, rowid, text)
+            VALUES ('delete', old.id, old.text);
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS posts_post_fts_update
+        AFTER UPDATE OF text ON posts_post BEGIN
+            INSERT INTO {TABLE}({TABLE}, rowid, text)
+            VALUES ('delete', old.id, old.text);
+            INSERT INTO {TABLE}(rowid, text) VALUES (new.id, new.text);
+        END""",
+)
+
+DROP = (
+    'DROP TRIGGER IF EXISTS posts_post_fts_insert',
+    'DROP TRIGGER IF EXISTS posts_post_fts_delete',
+    'DROP TRIGGER IF EXISTS posts_post_fts_update',
+    f'DROP TABLE IF EXISTS {TABLE}',
+)
+
+# Метки совпадений в snippet(): текст поста экранируется целиком, и
+# только после этого метки превращаются в <mark>.
+MARK_START = '\x02'
+MARK_END = '\x03'
+SNIPPET_TOKENS = 24
+
+USERS_LIMIT = 10
+
+
+def available(connection=default_connection):
+    return connection.vendor == 'sqlite'
+
+
+def install(connection=default_connection, rebuild=False):
+    """Создать индекс и триггеры, если их нет; rebuild — переиндексировать."""
+    if not available(connection):
+        return
+    with connection.cursor() as cursor:
+        for statement in SCHEMA:
+            cursor.execute(statement)
+        if rebuild:
+            cursor.execute(
+                f"INSERT INTO {TABLE}({TABLE}) VALUES ('rebuild')"
+            )
+
+
+def uninstall(connection=default_connection):
+    if not available(connection):
+        return
+    with connection.cursor() as cursor:
+        for statement in DROP:
+            cursor.execute(statement)
+
+
+def to_match(query):
+    """Запрос пользователя в выражение MATCH.
+
+    Слова берутся в кавычки, чтобы синтаксис FTS5 (AND, NEAR, *, :)
+    из ввода не интерпретировался; последнее слово ищется по префиксу.
+    Пустая строка означает, что искать нечего.
+    """
+    words = re.findall(r'\w+', query)
+    if not words:
+        return ''
+    return ' '.join(f'"{word}"' for word in words) + '*'
+
+
+def matching_ids(query):
+    """Подзапрос id постов, подходящих под запрос, для filter(pk__in=)."""
+    return RawSQL(
+        f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s',
+        (to_match(query),)
+    )
+
+
+def matching_users(query, limit=USERS_LIMIT):
+    # Диапазон вместо LIKE: он идёт по уникальному индексу username.
+    query = query.strip()
+    if not query:
+        return User.objects.none()
+    return User.objects.filter(
+        username__gte=query, username__lt=query + '\U0010ffff'
+    ).order_by('username')[:limit]
+
+
+def _encode(score, post_id):
+    payload = json.dumps([NEXT, [score, post_id]], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def _decode(cursor):
+    if not cursor:
+        return None
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        direction, (score, post_id) = json.loads(payload)
+        return float(score), int(post_id)
+    except (binascii.Error, ValueError, TypeError):
+        return None
+
+
+def _highlight(snippet):
+    return mark_safe(
+        escape(snippet).replace(MARK_START, '<mark>').replace(
+            MARK_END, '</mark>'
+        )
+    )
+
+
+def search_posts(query, per_page, cursor=None):
+    """Страница результатов поиска, лучшие совпадения первыми.
+
+    Пагинация keyset по (bm25, id): курсор хранит оценку и id последнего
+    поста страницы. У каждого поста заполнен атрибут ``snippet`` —
+    фрагмент текста с совпадениями в <mark>; группы подставляет
+    posts.groups.attach().
+    """
+    if not available():
+        return _search_like(query, per_page, cursor)
+    match = to_match(query)
+    if not match:
+        return CursorPage([])
+    after = _decode(cursor)
+    sql = (
+        f'SELECT id, score FROM ('
+        f'  SELECT rowid AS id, bm25({TABLE}) AS score'
+        f'  FROM {TABLE} WHERE {TABLE} MATCH %s'
+        f')'
+    )
+    params = [match]
+    if after is not None:
+        sql += ' WHERE score > %s OR (score = %s AND id > %s)'
+        params += [after[0], after[0], after[1]]
+    sql += ' ORDER BY score, id LIMIT %s'
+    params.append(per_page + 1)
+    # Индекс читается с той же базы, что и посты (см. core.db_router).
+    alias = router.db_for_read(Post)
+    with connections[alias].cursor() as db:
+        db.execute(sql, params)
+        ranked = db.fetchall()
+        has_more = len(ranked) > per_page
+        ranked = ranked[:per_page]
+        snippets = {}
+        if ranked:
+            # snippet() считается только для строк страницы.
+            db.execute(
+                f'SELECT rowid, snippet({TABLE}, 0, %s, %s, %s, %s) '
+                f'FROM {TABLE} WHERE {TABLE} MATCH %s AND rowid IN '
+                f'({", ".join(["%s"] * len(ranked))})',
+                [MARK_START, MARK_END, '…', SNIPPET_TOKENS, match]
+                + [post_id for post_id, _ in ranked]
+            )
+            snippets = dict(db.fetchall())
+    posts = Post.objects.using(alias).select_related('author').in_bulk(
+        [post_id for post_id, _ in ranked]
+    )
+    page = []
+    for post_id, _ in ranked:
+        post = posts.get(post_id)
+        if post is not None:
+            post.snippet = _highlight(snippets.get(post_id, ''))
+            page.append(post)
+    next_cursor = None
+    if has_more:
+        last_id, last_score = ranked[-1]
+        next_cursor = _encode(last_score, last_id)
+    return CursorPage(page, next_cursor=next_cursor)
+
+
+def _search_like(query, per_page, cursor):
+    query = query.strip()
+    if not query:
+        return CursorPage([])
+    paginator = CursorPaginator(
+        Post.objects.select_related('author').filter(text__icontains=query),
+        per_page,
+    )
+    page = paginator.get_page(cursor)
+    for post in page:
+        post.snippet = post.text
+    return page
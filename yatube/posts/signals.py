@@ -0,0 +1,179 @@
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core import pagecache
+from posts import (counters, feeds, follows, groups, search, thumbnails,
+                   versions)
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_state(sender, instance, raw=False, **kwargs):
+    instance._previous = None
+    if raw or instance.pk is None:
+        return
+    instance._previous = Post.objects.filter(pk=instance.pk).values(
+        'author_id', 'group_id', 'image'
+    ).first()
+    if (instance._previous
+            and instance._previous['image'] != instance.image.name):
+        instance.thumbnails = ''
+
+
+@receiver(post_save, sender=Post)
+def update_on_post_save(sender, instance, created, raw=False, **kwargs):
+    # Счётчики обновляются раньше лент: лента может лениво создать
+    # AuthorStats, и тогда новый пост уже будет в нём посчитан.
+    if raw:
+        return
+    versions.bump(*versions.post_scopes(instance.author_id,
+                                        instance.group_id))
+    pagecache.purge(versions.post_scope(instance.pk))
+    if created:
+        counters.bump_author(instance.author_id, posts_count=1)
+        counters.bump_group(instance.group_id, 1)
+        feeds.fan_out_post(instance)
+        if instance.image:
+            thumbnails.schedule(instance.pk)
+        return
+    previous = getattr(instance, '_previous', None)
+    if not previous:
+        return
+    versions.bump(*versions.post_scopes(previous['author_id'],
+                                        previous['group_id']))
+    if instance.image and previous['image'] != instance.image.name:
+        thumbnails.schedule(instance.pk)
+    if previous['author_id'] != instance.author_id:
+        counters.bump_author(previous['author_id'], posts_count=-1)
+        counters.bump_author(instance.author_id, posts_count=1)
+        feeds.refan_post(instance)
+    if previous['group_id'] != instance.group_id:
+        counters.bump_group(previous['group_id'], -1)
+        counters.bump_group(instance.group_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def update_counters_on_post_delete(sender, instance, **kwargs):
+    counters.bump_author(instance.author_id, posts_count=-1)
+    counters.bump_group(instance.group_id, -1)
+    versions.bump(*versions.post_scopes(instance.author_id,
+                                        instance.group_id))
+    pagecache.purge(versions.post_scope(instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+def update_counters_on_comment_save(sender, instance, created, raw=False,
+                                    **kwargs):
+    if raw:
+        return
+    # Правка комментария числа не меняет, но пост отмечается изменённым.
+    counters.bump_comments(instance.post_id, 1 if created else 0)
+    pagecache.purge(versions.post_scope(instance.post_id))
+
+
+@receiver(post_delete, sender=Comment)
+def update_counters_on_comment_delete(sender, instance, **kwargs):
+    counters.bump_comments(instance.post_id, -1)
+    pagecache.purge(versions.post_scope(instance.post_id))
+
+
+@receiver(post_save, sender=Follow)
+def update_feeds_on_follow(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        feeds.follow_added(instance)
+        versions.bump(versions.author_scope(instance.author_id),
+                      versions.follower_scope(instance.user_id))
+        follows.invalidate(instance.user_id)
+
+
+@receiver(post_delete, sender=Follow)
+def update_feeds_on_unfollow(sender, instance, **kwargs):
+    feeds.follow_removed(instance)
+    versions.bump(versions.author_scope(instance.author_id),
+                  versions.follower_scope(instance.user_id))
+    follows.invalidate(instance.user_id)
+
+
+def _group_author_ids(group_id):
+    return list(Post.objects.filter(group_id=group_id).values_list(
+        'author_id', flat=True
+    ).distinct())
+
+
+@receiver(pre_delete, sender=Group)
+def remember_group_authors(sender, instance, **kwargs):
+    # В post_delete посты уже отвязаны от группы (SET_NULL).
+    instance._author_ids = _group_author_ids(instance.pk)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def bump_versions_on_group_change(sender, instance, raw=False, **kwargs):
+    # Название и slug группы видны на её странице, в общей ленте и в
+    # профилях авторов её постов.
+    if raw:
+        return
+    author_ids = vars(instance).pop('_author_ids', None)
+    if author_ids is None:
+        author_ids = _group_author_ids(instance.pk)
+    versions.bump(versions.GLOBAL, versions.group_scope(instance.pk),
+                  *map(versions.author_scope, author_ids))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_registry(sender, **kwargs):
+    # В том числе для loaddata (raw): реестр должен видеть новые строки.
+    groups.invalidate()
+
+
+@receiver(pre_save, sender=User)
+def remember_previous_username(sender, instance, raw=False,
+                               update_fields=None, **kwargs):
+    instance._username_changed = False
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    previous = User.objects.filter(pk=instance.pk).values_list(
+        'username', flat=True
+    ).first()
+    instance._username_changed = previous != instance.username
+
+
+@receiver(post_save, sender=User)
+def invalidate_post_fragments_on_rename(sender, instance, **kwargs):
+    # Имя автора входит в кешированный фрагмент includes/post_item.html,
+    # ключ которого версионируется по Post.updated_at. Имена и ссылки
+    # на профили комментаторов есть на странице поста, чей ETag тоже
+    # зависит от updated_at.
+    if getattr(instance, '_username_changed', False):
+        now = timezone.now()
+        Post.objects.filter(author=instance).update(updated_at=now)
+        commented = list(Comment.objects.filter(author=instance).exclude(
+            post__author=instance
+        ).values_list('post_id', flat=True).distinct())
+        Post.objects.filter(pk__in=commented).update(updated_at=now)
+        pagecache.purge(*map(versions.post_scope, commented))
+        group_ids = Post.objects.filter(
+            author=instance, group__isnull=False
+        ).values_list('group_id', flat=True).distinct()
+        versions.bump(
+            versions.GLOBAL, versions.author_scope(instance.pk),
+            *(versions.group_scope(group_id) for group_id in group_ids)
+        )
+
+
+def restore_search_triggers(sender, using, **kwargs):
+    # Миграции на SQLite пересоздают posts_post и теряют триггеры
+    # поискового индекса; возвращаем их, если индекс уже установлен.
+    connection = connections[using]
+    if (search.available(connection)
+            and search.TABLE in connection.introspection.table_names()):
+        search.install(connection)
@@ -0,0 +1,149 @@
+import gzip
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(author=cls.author, group=cls.group,
+                                text=f'Пост {number}')
+            for number in range(5)
+        ]
+        for number in range(3):
+            Comment.objects.create(post=cls.posts[0], author=cls.reader,
+                                   text=f'Комментарий {number}')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def get(self, name, params=None, **kwargs):
+        return self.client.get(reverse(f'api:{name}', kwargs=kwargs), params)
+
+    def test_posts_match_html_listing(self):
+        data = self.get('posts', {'limit': 2}).json()
+        html = self.client.get(reverse('posts:index'))
+        self.assertEqual(
+            [post['id'] for post in data['results']],
+            [post.pk for post in html.context['page_obj']][:2],
+        )
+        self.assertEqual(data['results'][0], {
+            'id': self.posts[-1].pk,
+            'text': 'Пост 4',
+            'preview': 'Пост 4',
+            'pub_date': data['results'][0]['pub_date'],
+            'updated_at': data['results'][0]['updated_at'],
+            'author': 'author',
+            'group': 'group',
+            'image': None,
+            'comments_count': 0,
+        })
+
+    def test_cursor_walks_all_posts(self):
+        seen = []
+        params = {'limit': 2, 'fields': 'id'}
+        while True:
+            data = self.get('posts', params).json()
+            seen += [post['id'] for post in data['results']]
+            if not data['next_cursor']:
+                break
+            params['cursor'] = data['next_cursor']
+        self.assertEqual(seen, [post.pk for post in reversed(self.posts)])
+
+    def test_sparse_fields_select_only_those_columns(self):
+        response = self.get('group_posts', {'fields': 'id,text'},
+                            slug='group')
+        self.assertEqual(set(response.json()['results'][0]), {'id', 'text'})
+        response = self.get('posts', {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json()['error'])
+
+    def test_detail_comments_profile_and_groups(self):
+        post = self.posts[0]
+        self.assertEqual(
+            self.get('post_detail', {'fields': 'comments_count'},
+                     post_id=post.pk).json(),
+            {'comments_count': 3},
+        )
+        comments = self.get('post_comments', post_id=post.pk).json()
+        self.assertEqual(
+            [comment['text'] for comment in comments['results']],
+            ['Комментарий 0', 'Комментарий 1', 'Комментарий 2'],
+        )
+        self.assertEqual(
+            len(self.get('author_posts', username='author').json()[
+                'results'
+            ]), 5
+        )
+        self.assertEqual(
+            self.get('group_list', {'fields': 'slug'}).json(),
+            {'results': [{'slug': 'group'}]},
+        )
+        for name, kwargs in (('post_detail', {'post_id': 0}),
+                             ('author_posts', {'username': 'nobody'}),
+                             ('group_posts', {'slug': 'nobody'})):
+            with self.subTest(name=name):
+                self.assertEqual(self.get(name, **kwargs).status_code, 404)
+
+    def test_feed_requires_login(self):
+        self.assertEqual(self.get('feed').status_code, 401)
+        self.client.force_login(self.reader)
+        data = self.get('feed', {'fields': 'id,author'}).json()
+        self.assertEqual(
+            data['results'],
+            [{'id': post.pk, 'author': 'author'}
+             for post in reversed(self.posts)],
+        )
+
+    def test_feed_etag(self):
+        self.client.force_login(self.reader)
+        etag = self.get('feed')['ETag']
+        self.assertEqual(
+            self.client.get(reverse('api:feed'),
+                            HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Post.objects.create(author=self.author, text='Новый пост')
+        response = self.client.get(reverse('api:feed'),
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Новый пост')
+        etag = response['ETag']
+        other = User.objects.create_user(username='other')
+        Post.objects.create(author=other, text='Чужой пост')
+        self.assertEqual(
+            self.client.get(reverse('api:feed'),
+                            HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Follow.objects.create(user=self.reader, author=other)
+        response = self.client.get(reverse('api:feed'),
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Чужой пост')
+
+    def test_gzip_and_etag(self):
+        response = self.client.get(reverse('api:posts'),
+                                   HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        data = json.loads(gzip.decompress(response.content))
+        self.assertEqual(len(data['results']), 5)
+        repeat = self.client.get(reverse('api:posts'),
+                                 HTTP_ACCEPT_ENCODING='gzip',
+                                 HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(repeat.status_code, 304)
+        Post.objects.create(author=self.author, text='Новый пост')
+        changed = self.client.get(reverse('api:posts'),
+                                  HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
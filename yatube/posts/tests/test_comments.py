@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(COMMENTS_COUNT=10)
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        commenters = [
+            User.objects.create_user(username=f'reader{number}')
+            for number in range(3)
+        ]
+        for number in range(25):
+            Comment.objects.create(
+                post=cls.post,
+                author=commenters[number % 3],
+                text=f'Комментарий {number}',
+            )
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_post_detail_shows_first_page(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        response = self.client.get(url)
+        comments = response.context['comments']
+        self.assertEqual([comment.text for comment in comments],
+                         [f'Комментарий {number}' for number in range(10)])
+        self.assertTrue(comments.has_next())
+        response = self.client.get(url, {'cursor': comments.next_cursor})
+        self.assertEqual(response.context['comments'][0].text,
+                         'Комментарий 10')
+
+    def test_post_detail_queries_do_not_depend_on_commenters(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.client.get(url)
+        with self.assertNumQueries(4):
+            self.client.get(url)
+
+    def test_load_more_returns_remaining_pages(self):
+        url = reverse('posts:comments_more',
+                      kwargs={'post_id': self.post.pk})
+        texts = []
+        cursor = ''
+        while True:
+            data = self.client.get(url, {'cursor': cursor}).json()
+            texts += [comment['text'] for comment in data['comments']]
+            cursor = data['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(texts,
+                         [f'Комментарий {number}' for number in range(25)])
+        self.assertEqual(data['comments'][-1]['author'], 'reader0')
+
+    def test_load_more_unknown_post(self):
+        url = reverse('posts:comments_more', kwargs={'post_id': 10 ** 6})
+        self.assertEqual(self.client.get(url).status_code, 404)
@@ -0,0 +1,145 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Follow, Group, Post, ScopeVersion
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Описание тестовой группы',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Описание другой группы',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Тестовый пост'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_unchanged_pages_return_304(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn('Last-Modified', response)
+                with CaptureQueriesContext(connection) as queries:
+                    second = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                self.assertEqual(second.status_code, 304)
+                self.assertLessEqual(len(queries), 2)
+
+    def test_post_changes_invalidate_its_scopes_only(self):
+        index = reverse('posts:index')
+        group = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        other = reverse('posts:group_list',
+                        kwargs={'slug': self.other_group.slug})
+        etags = {url: self.client.get(url)['ETag']
+                 for url in (index, group, other)}
+        Post.objects.create(author=self.reader, group=self.other_group,
+                            text='Новый пост')
+        statuses = {
+            url: self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code
+            for url, etag in etags.items()
+        }
+        self.assertEqual(statuses, {index: 200, group: 304, other: 200})
+
+    def test_new_comment_invalidates_post_detail(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        etag = self.client.get(url)['ETag']
+        Comment.objects.create(post=self.post, author=self.reader, text='Да')
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200
+        )
+
+    def backdate(self):
+        # Last-Modified точен до секунды: сдвигаем отметки в прошлое,
+        # чтобы изменение в ту же секунду было видно.
+        hour_ago = timezone.now() - timedelta(hours=1)
+        Post.objects.filter(pk=self.post.pk).update(updated_at=hour_ago)
+        ScopeVersion.objects.update(changed_at=hour_ago)
+
+    def test_comments_change_last_modified(self):
+        for url in (
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('api:post_comments', kwargs={'post_id': self.post.pk}),
+        ):
+            with self.subTest(url=url):
+                self.backdate()
+                since = self.client.get(url)['Last-Modified']
+                self.assertEqual(self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=since
+                ).status_code, 304)
+                comment = Comment.objects.create(
+                    post=self.post, author=self.reader, text='Да'
+                )
+                response = self.client.get(url,
+                                           HTTP_IF_MODIFIED_SINCE=since)
+                self.assertEqual(response.status_code, 200)
+                self.backdate()
+                since = self.client.get(url)['Last-Modified']
+                comment.delete()
+                self.assertEqual(self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=since
+                ).status_code, 200)
+
+    def test_commenter_rename_invalidates_post_detail(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        Comment.objects.create(post=self.post, author=self.reader, text='Да')
+        etag = self.client.get(url)['ETag']
+        reader = User.objects.get(pk=self.reader.pk)
+        reader.username = 'renamed'
+        reader.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, '/profile/renamed/')
+
+    def test_group_change_invalidates_profiles_of_its_authors(self):
+        profile = reverse('posts:profile', kwargs={'username': self.author})
+        etag = self.client.get(profile)['ETag']
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'new-slug'
+        group.save()
+        response = self.client.get(profile, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, '/group/new-slug/')
+        etag = response['ETag']
+        group.delete()
+        response = self.client.get(profile, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, '/group/new-slug/')
+
+    def test_etag_depends_on_user_and_follow_state(self):
+        url = reverse('posts:profile', kwargs={'username': self.author})
+        anonymous = self.client.get(url)['ETag']
+        self.client.force_login(self.reader)
+        etag = self.client.get(url)['ETag']
+        self.assertNotEqual(anonymous, etag)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200
+        )
@@ -0,0 +1,135 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import counters, versions
+from posts.counters import author_stats
+from ..models import AuthorStats, Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Описание тестовой группы',
+        )
+        cls.another_group = Group.objects.create(
+            title='Группа 2',
+            slug='new_group_slug',
+            description='Описание группы 2'
+        )
+
+    def setUp(self):
+        author_stats(self.user.pk)
+        self.post = Post.objects.create(
+            author=self.user, group=self.group, text='Тестовый пост'
+        )
+
+    def assertCounters(self, user_posts, group_posts, another_group_posts):
+        self.assertEqual(author_stats(self.user.pk).posts_count, user_posts)
+        self.group.refresh_from_db()
+        self.another_group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, group_posts)
+        self.assertEqual(self.another_group.posts_count, another_group_posts)
+
+    def test_create_and_delete_post(self):
+        self.assertCounters(1, 1, 0)
+        self.post.delete()
+        self.assertCounters(0, 0, 0)
+
+    def test_group_change(self):
+        self.post.group = self.another_group
+        self.post.save()
+        self.assertCounters(1, 0, 1)
+        self.post.group = None
+        self.post.save()
+        self.assertCounters(1, 0, 0)
+
+    def test_bump_creates_missing_row(self):
+        AuthorStats.objects.filter(user=self.user).delete()
+        Post.objects.create(author=self.user, text='Ещё пост')
+        self.assertCounters(2, 1, 0)
+
+    def test_bump_is_not_lost_when_row_appears_concurrently(self):
+        AuthorStats.objects.filter(user=self.user).delete()
+
+        def concurrent_create(author_id):
+            # Строку вставил другой запрос по подсчёту, в котором нового
+            # поста ещё не было.
+            AuthorStats.objects.create(user_id=author_id, posts_count=1)
+            return None
+
+        with mock.patch('posts.counters._create_stats', concurrent_create):
+            Post.objects.create(author=self.user, text='Ещё пост')
+        self.assertCounters(2, 1, 0)
+
+    def test_author_with_posts_followers_and_comments_can_be_deleted(self):
+        Follow.objects.create(user=self.other, author=self.user)
+        Follow.objects.create(user=self.user, author=self.other)
+        other_post = Post.objects.create(author=self.other, text='Чужой')
+        Comment.objects.create(post=other_post, author=self.user, text='Да')
+        Comment.objects.create(post=self.post, author=self.other, text='Ок')
+        author_stats(self.other.pk)
+        User.objects.get(pk=self.user.pk).delete()
+        connection.check_constraints()
+        self.assertFalse(AuthorStats.objects.filter(
+            user_id=self.user.pk).exists())
+        self.assertEqual(author_stats(self.other.pk).followers_count, 0)
+
+    def test_comments_count(self):
+        comment = Comment.objects.create(
+            post=self.post, author=self.other, text='Комментарий'
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        comment.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+
+    def test_recount_command(self):
+        AuthorStats.objects.update(posts_count=42)
+        Group.objects.update(posts_count=42)
+        Post.objects.update(comments_count=42)
+        call_command('recount_counters', stdout=StringIO())
+        self.assertCounters(1, 1, 0)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+
+    def test_views_read_stored_counters(self):
+        AuthorStats.objects.filter(user=self.user).update(posts_count=7)
+        client = Client()
+        client.force_login(self.other)
+        urls = [
+            reverse('posts:profile', kwargs={'username': self.user}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertEqual(response.context['posts_count'], 7)
+
+    def test_page_count_cached_before_commit_is_forgotten_after(self):
+        scope = versions.author_scope(self.user.pk)
+        callbacks = []
+        with mock.patch.object(transaction, 'on_commit', callbacks.append):
+            counters.forget_page_counts([scope])
+        # Параллельный запрос посчитал записи до коммита нового поста.
+        counters.page_count(scope, Post.objects.none())
+        for callback in callbacks:
+            callback()
+        self.assertEqual(
+            counters.page_count(scope, Post.objects.filter(author=self.user)),
+            1,
+        )
@@ -0,0 +1,80 @@
+import csv
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import export
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Описание тестовой группы',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, group=cls.group, text=f'Пост, {number}')
+            for number in range(25)
+        )
+        cls.post = Post.objects.first()
+        Comment.objects.create(post=cls.post, author=cls.staff, text='Да')
+        Follow.objects.create(user=cls.staff, author=cls.user)
+
+    def test_rows_walk_table_in_chunks(self):
+        ids = [row[0] for row in export.rows('posts', chunk_size=4)]
+        self.assertEqual(
+            ids, list(Post.objects.order_by('pk').values_list('pk', flat=True))
+        )
+
+    def test_command_writes_gzip_jsonl(self):
+        with tempfile.TemporaryDirectory() as directory:
+            call_command('export_yatube', directory, '--gzip',
+                         '--chunk-size', '10', stdout=StringIO())
+            self.assertEqual(
+                sorted(os.listdir(directory)),
+                sorted(f'{table}.jsonl.gz' for table in export.TABLES)
+            )
+            path = os.path.join(directory, 'posts.jsonl.gz')
+            with gzip.open(path, 'rt', encoding='utf-8') as file:
+                posts = [json.loads(line) for line in file]
+        self.assertEqual(len(posts), 25)
+        self.assertEqual(posts[0]['author_id'], self.user.pk)
+        self.assertEqual(posts[0]['text'], 'Пост, 0')
+
+    def test_endpoint_streams_csv_for_staff(self):
+        client = Client()
+        client.force_login(self.staff)
+        url = reverse('posts:export', kwargs={'table': 'comments'})
+        response = client.get(url, {'format': 'csv'})
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        comment = Comment.objects.get()
+        self.assertEqual(list(csv.reader(StringIO(content))), [
+            ['id', 'post_id', 'author_id', 'text', 'created'],
+            [str(comment.pk), str(self.post.pk), str(self.staff.pk), 'Да',
+             comment.created.isoformat()],
+        ])
+
+    def test_endpoint_is_staff_only(self):
+        client = Client()
+        client.force_login(self.user)
+        url = reverse('posts:export', kwargs={'table': 'posts'})
+        self.assertEqual(client.get(url).status_code, 302)
+        client.force_login(self.staff)
+        url = reverse('posts:export', kwargs={'table': 'users'})
+        self.assertEqual(client.get(url).status_code, 404)
@@ -0,0 +1,115 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.feeds import as_posts, feed_for
+from ..models import AuthorStats, FeedEntry, Follow, Post
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.other_reader = User.objects.create_user(username='other_reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.star = User.objects.create_user(username='star')
+        cls.stranger = User.objects.create_user(username='stranger')
+        for author in (cls.author, cls.star, cls.stranger):
+            for number in range(3):
+                Post.objects.create(author=author, text=f'{author} {number}')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def assertFeedMatchesJoin(self, user):
+        expected = Post.objects.filter(author__following__user=user)
+        self.assertEqual(as_posts(feed_for(user)), list(expected))
+
+    def test_follow_backfills_and_unfollow_drops(self):
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(
+            FeedEntry.objects.filter(user=self.reader).count(), 3)
+        self.assertFeedMatchesJoin(self.reader)
+        follow.delete()
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+        self.assertFeedMatchesJoin(self.reader)
+
+    def test_new_post_is_fanned_out(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['page_obj'][0], post)
+        self.assertFeedMatchesJoin(self.reader)
+
+    def test_author_change_moves_post_between_feeds(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.filter(author=self.stranger).first()
+        post.author = self.author
+        post.save()
+        self.assertTrue(FeedEntry.objects.filter(
+            user=self.reader, post=post).exists())
+        self.assertFeedMatchesJoin(self.reader)
+
+    @override_settings(FEED_FANOUT_LIMIT=1, FEED_FANOUT_MARGIN=0)
+    def test_popular_author_is_pulled_on_read(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.reader, author=self.star)
+        Follow.objects.create(user=self.other_reader, author=self.star)
+        Post.objects.create(author=self.star, text='Пост звезды')
+        self.assertFalse(FeedEntry.objects.filter(
+            post__text='Пост звезды').exists())
+        self.assertFeedMatchesJoin(self.reader)
+        self.assertFeedMatchesJoin(self.other_reader)
+        Follow.objects.filter(user=self.other_reader).delete()
+        # Отписка не раскладывает посты: автор остаётся популярным до
+        # rebuild_feeds --popular.
+        self.assertFalse(FeedEntry.objects.filter(
+            post__text='Пост звезды').exists())
+        self.assertFeedMatchesJoin(self.reader)
+        call_command('rebuild_feeds', '--popular', stdout=StringIO())
+        self.assertTrue(FeedEntry.objects.filter(
+            user=self.reader, post__text='Пост звезды').exists())
+        self.assertFeedMatchesJoin(self.reader)
+
+    @override_settings(FEED_FANOUT_LIMIT=2, FEED_FANOUT_MARGIN=1)
+    def test_popularity_has_hysteresis(self):
+        Follow.objects.create(user=self.reader, author=self.star)
+        Follow.objects.create(user=self.other_reader, author=self.star)
+        Follow.objects.create(user=self.author, author=self.star)
+        self.assertTrue(AuthorStats.objects.get(user=self.star).popular)
+        Follow.objects.filter(user=self.author).delete()
+        call_command('rebuild_feeds', '--popular', stdout=StringIO())
+        # Подписчиков ровно FEED_FANOUT_LIMIT: ещё не выше границы
+        # возврата FEED_FANOUT_LIMIT - FEED_FANOUT_MARGIN.
+        self.assertTrue(AuthorStats.objects.get(user=self.star).popular)
+        Post.objects.create(author=self.star, text='Пост звезды')
+        self.assertFalse(FeedEntry.objects.filter(
+            post__text='Пост звезды').exists())
+        Follow.objects.filter(user=self.other_reader).delete()
+        call_command('rebuild_feeds', '--popular', stdout=StringIO())
+        self.assertFalse(AuthorStats.objects.get(user=self.star).popular)
+        self.assertEqual(FeedEntry.objects.filter(
+            user=self.reader, post__author=self.star).count(), 4)
+        self.assertFeedMatchesJoin(self.reader)
+
+    def test_rebuild_feeds_command(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        FeedEntry.objects.all().delete()
+        call_command('rebuild_feeds', 'reader', stdout=StringIO())
+        self.assertFeedMatchesJoin(self.reader)
+
+    def test_rebuild_feeds_in_small_batches(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.reader, author=self.stranger)
+        FeedEntry.objects.all().delete()
+        call_command('rebuild_feeds', '--batch-size', '2', stdout=StringIO())
+        self.assertEqual(
+            FeedEntry.objects.filter(user=self.reader).count(), 6)
+        self.assertFeedMatchesJoin(self.reader)
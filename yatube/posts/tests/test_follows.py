@@ -0,0 +1,127 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import QuerySet
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import follows
+from posts.counters import author_stats
+from posts.feeds import as_posts, feed_for
+from ..models import Follow, Post
+
+User = get_user_model()
+
+
+class FollowTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(3)
+        ]
+        for author in cls.authors:
+            Post.objects.create(author=author, text=f'Пост {author}')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def bulk(self, action, usernames):
+        return self.client.post(reverse('posts:follow_bulk'), {
+            'action': action, 'authors': usernames,
+        }).json()
+
+    def test_bulk_follow(self):
+        result = self.bulk('follow',
+                           ['author0', 'author1', 'reader', 'nobody'])
+        self.assertEqual(result['changed'], ['author0', 'author1'])
+        self.assertEqual(result['unknown'], ['nobody'])
+        self.assertEqual(
+            follows.following_ids(self.reader),
+            {self.authors[0].pk, self.authors[1].pk},
+        )
+        self.assertEqual(author_stats(self.authors[0].pk).followers_count, 1)
+        self.assertEqual(
+            as_posts(feed_for(self.reader)),
+            list(Post.objects.filter(author__following__user=self.reader)),
+        )
+        # Повтор ничего не меняет.
+        self.assertEqual(self.bulk('follow', ['author0'])['changed'], [])
+        self.assertEqual(author_stats(self.authors[0].pk).followers_count, 1)
+
+    def test_bulk_unfollow(self):
+        self.bulk('follow', ['author0', 'author1'])
+        result = self.bulk('unfollow', ['author0', 'author2'])
+        self.assertEqual(result['changed'], ['author0'])
+        self.assertEqual(follows.following_ids(self.reader),
+                         {self.authors[1].pk})
+        self.assertEqual(author_stats(self.authors[0].pk).followers_count, 0)
+        self.assertEqual(
+            [post.author for post in as_posts(feed_for(self.reader))],
+            [self.authors[1]],
+        )
+
+    def test_follow_reports_only_rows_it_inserted(self):
+        select_for_update = QuerySet.select_for_update
+
+        def racing(queryset, *args, **kwargs):
+            # Параллельный запрос подписал на первого автора, пока этот
+            # ждал блокировку.
+            Follow.objects.get_or_create(user=self.reader,
+                                         author=self.authors[0])
+            return select_for_update(queryset, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, 'select_for_update', racing):
+            new = follows.follow(self.reader,
+                                 [author.pk for author in self.authors[:2]])
+        self.assertEqual(new, {self.authors[1].pk})
+        self.assertEqual(author_stats(self.authors[0].pk).followers_count, 1)
+
+    def test_bulk_rejects_bad_requests(self):
+        url = reverse('posts:follow_bulk')
+        self.assertEqual(self.client.get(url).status_code, 405)
+        self.assertEqual(
+            self.client.post(url, {'action': 'like'}).status_code, 400
+        )
+        too_many = [f'user{number}' for number in range(
+            follows.BULK_LIMIT + 1
+        )]
+        response = self.client.post(
+            url, {'action': 'follow', 'authors': too_many}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_following_ids_cached_and_invalidated(self):
+        Follow.objects.create(user=self.reader, author=self.authors[0])
+        follows.following_ids(self.reader)
+        with self.assertNumQueries(0):
+            self.assertEqual(follows.following_ids(self.reader),
+                             {self.authors[0].pk})
+        self.client.get(reverse('posts:profile_follow',
+                                kwargs={'username': 'author1'}))
+        self.assertEqual(follows.following_ids(self.reader),
+                         {self.authors[0].pk, self.authors[1].pk})
+        self.client.get(reverse('posts:profile_unfollow',
+                                kwargs={'username': 'author0'}))
+        self.assertEqual(follows.following_ids(self.reader),
+                         {self.authors[1].pk})
+
+    def test_profile_follow_unknown_author(self):
+        response = self.client.get(reverse(
+            'posts:profile_follow', kwargs={'username': 'nobody'}
+        ))
+        self.assertEqual(response.status_code, 404)
+
+    def test_listing_marks_followed_authors(self):
+        url = reverse('posts:index')
+        first = self.client.get(url)
+        self.assertNotContains(first, 'вы подписаны')
+        self.bulk('follow', ['author0'])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'вы подписаны', count=1)
@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import groups
+from posts.forms import PostForm
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class GroupRegistryTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Альфа', slug='alpha', description='Первая группа'
+        )
+        cls.other = Group.objects.create(
+            title='Бета', slug='beta', description='Вторая группа'
+        )
+        Post.objects.create(author=cls.user, group=cls.group, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        groups.all_groups()
+
+    def test_lookups_without_queries(self):
+        slugs = list(Group.objects.values_list('slug', flat=True))
+        with self.assertNumQueries(0):
+            self.assertEqual(groups.by_slug('alpha').pk, self.group.pk)
+            self.assertEqual(groups.by_pk(self.other.pk).slug, 'beta')
+            self.assertIsNone(groups.by_slug('missing'))
+            self.assertEqual(
+                [group.slug for group in groups.all_groups()], slugs
+            )
+
+    def test_form_choices_without_queries(self):
+        with self.assertNumQueries(0):
+            choices = list(PostForm().fields['group'].choices)
+        self.assertEqual(
+            [label for _, label in choices[1:]], ['Бета', 'Альфа']
+        )
+
+    def test_form_accepts_registry_group(self):
+        form = PostForm({'text': 'Текст', 'group': self.other.pk})
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data['group'], self.other)
+
+    def test_change_invalidates_registry(self):
+        group = Group.objects.get(slug='alpha')
+        group.title = 'Гамма'
+        group.save()
+        self.assertEqual(groups.by_slug('alpha').title, 'Гамма')
+        Group.objects.filter(slug='beta').delete()
+        self.assertIsNone(groups.by_slug('beta'))
+        Group.objects.create(title='Дельта', slug='delta', description='')
+        self.assertEqual(groups.by_slug('delta').title, 'Дельта')
+
+    def test_other_process_picks_up_new_generation(self):
+        # Другой процесс: свой снимок в памяти, общий кеш.
+        stale = groups._local
+        Group.objects.create(title='Дельта', slug='delta', description='')
+        groups._local = stale
+        self.assertEqual(groups.by_slug('delta').title, 'Дельта')
+
+    def test_listing_uses_registry(self):
+        response = Client().get(reverse('posts:index'))
+        post = response.context['page_obj'][0]
+        self.assertIs(post.group, groups.by_pk(self.group.pk))
+        response = Client().get(
+            reverse('posts:group_list', kwargs={'slug': 'missing'})
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,83 @@
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.counters import author_stats
+from ..models import FeedEntry, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ImportPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Описание тестовой группы',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def run_import(self, name, content, *args):
+        path = os.path.join(self.dir.name, name)
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            file.write(content)
+        out = StringIO()
+        call_command('import_posts', path, *args, stdout=out)
+        return out.getvalue()
+
+    def test_import_jsonl(self):
+        rows = [
+            {'text': f'Пост {number}', 'author': 'author',
+             'group': 'test-slug'}
+            for number in range(30)
+        ]
+        rows += [
+            {'text': 'Без группы', 'author': 'author'},
+            {'text': 'Чужой', 'author': 'ghost'},
+            {'text': '', 'author': 'author'},
+            {'text': 'Нет группы', 'author': 'author', 'group': 'missing'},
+        ]
+        content = '\n'.join(json.dumps(row) for row in rows) + '\n{broken\n'
+        rejects = os.path.join(self.dir.name, 'rejects.jsonl')
+        output = self.run_import(
+            'posts.jsonl', content,
+            '--batch-size', '7', '--transaction-size', '10',
+            '--rejects', rejects,
+        )
+        self.assertIn('Импортировано 31, отклонено 4', output)
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 31)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 30)
+        self.assertEqual(author_stats(self.author.pk).posts_count, 31)
+        self.assertEqual(FeedEntry.objects.filter(user=self.reader).count(),
+                         31)
+        with open(rejects, encoding='utf-8') as file:
+            reasons = [json.loads(line) for line in file]
+        self.assertEqual([reason['line'] for reason in reasons],
+                         [32, 33, 34, 35])
+
+    def test_import_csv(self):
+        out = StringIO()
+        writer = csv.writer(out)
+        writer.writerow(['text', 'author', 'group'])
+        writer.writerow(['Первый, с запятой', 'author', ''])
+        writer.writerow(['Второй\nв две строки', 'author', 'test-slug'])
+        output = self.run_import('posts.csv', out.getvalue())
+        self.assertIn('Импортировано 2, отклонено 0', output)
+        self.assertTrue(Post.objects.filter(
+            text='Второй\nв две строки', group=self.group
+        ).exists())
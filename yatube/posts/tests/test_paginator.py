@@ -2,10 +2,13 @@ import math
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db import transaction
-from django.test import Client, TestCase
+from django.template.loader import render_to_string
+from django.test import Client, SimpleTestCase, TestCase, override_settings
 from django.urls import reverse
 
+from posts.paginators import CountedPaginator, elided_page_range
 from ..models import Group, Post
 
 User = get_user_model()
@@ -37,6 +40,8 @@ class PaginatorViewsTest(TestCase):
         cls.TEST_URLS = [cls.INDEX, cls.GROUP_PAGE_URL, cls.PROFILE]
 
     def setUp(self):
+        # Посты созданы bulk_create, без сброса закешированного числа.
+        cache.clear()
         self.authorized_client = Client()
 
     def test_first_page_contains_ten_records(self):
@@ -57,3 +62,97 @@ class PaginatorViewsTest(TestCase):
                 )
                 self.assertEqual(len(response.context['page_obj']),
                                  expected_last_page_post_count)
+
+    def test_count_is_cached_until_new_post(self):
+        self.authorized_client.get(self.INDEX)
+        with self.assertNumQueries(2):
+            response = self.authorized_client.get(self.INDEX)
+        self.assertEqual(response.context['page_obj'].paginator.count,
+                         self.NUM_POSTS_TO_CREATE)
+        Post.objects.create(author=self.user, text='Ещё пост')
+        response = self.authorized_client.get(self.INDEX)
+        self.assertEqual(response.context['page_obj'].paginator.count,
+                         self.NUM_POSTS_TO_CREATE + 1)
+
+
+class ElidedPageRangeTests(SimpleTestCase):
+    def test_window_with_gaps(self):
+        self.assertEqual(elided_page_range(50, 100),
+                         [1, None, 48, 49, 50, 51, 52, None, 100])
+        self.assertEqual(elided_page_range(1, 100), [1, 2, 3, None, 100])
+        self.assertEqual(elided_page_range(5, 100),
+                         [1, 2, 3, 4, 5, 6, 7, None, 100])
+        self.assertEqual(elided_page_range(3, 7), list(range(1, 8)))
+
+    def test_rendered_size_does_not_depend_on_page_count(self):
+        sizes = []
+        for pages in (10 ** 3, 10 ** 6):
+            paginator = CountedPaginator([], 10, count=pages * 10)
+            html = render_to_string('includes/paginator.html',
+                                    {'page_obj': paginator.page(pages // 2)})
+            self.assertEqual(html.count('page-item'), 13)
+            sizes.append(len(html))
+        # Разница только в числе цифр номеров страниц.
+        self.assertLess(sizes[1] - sizes[0], 100)
+
+
+@override_settings(PAGINATION_MODE='cursor', PAGINATION_COUNT_CAP=11)
+class CursorPaginatorViewsTest(TestCase):
+
+    INDEX = reverse('posts:index')
+    PROFILE = reverse('posts:profile', kwargs={'username': 'User'})
+    GROUP_PAGE_URL = reverse('posts:group_list', kwargs={'slug': 'test-slug'})
+    NUM_POSTS_TO_CREATE = 13
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='User')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Описание тестовой группы',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, group=cls.group, text=f'Пост {number}')
+            for number in range(cls.NUM_POSTS_TO_CREATE)
+        )
+        cls.TEST_URLS = [cls.INDEX, cls.GROUP_PAGE_URL, cls.PROFILE]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cursor_pages_walk_all_posts_in_order(self):
+        expected = list(Post.objects.order_by('-pub_date', '-id'))
+        for url in self.TEST_URLS:
+            with self.subTest(url=url):
+                first = self.client.get(url).context['page_obj']
+                self.assertTrue(first.is_cursor)
+                self.assertFalse(first.has_previous())
+                second = self.client.get(
+                    url, {'cursor': first.next_cursor}).context['page_obj']
+                self.assertFalse(second.has_next())
+                self.assertEqual(list(first) + list(second), expected)
+                back = self.client.get(
+                    url, {'cursor': second.previous_cursor}
+                ).context['page_obj']
+                self.assertEqual(list(back), list(first))
+
+    def test_page_number_still_supported(self):
+        response = self.client.get(self.INDEX, {'page': 2})
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj.number, 2)
+        self.assertEqual(len(page_obj),
+                         self.NUM_POSTS_TO_CREATE - settings.VIEW_COUNT)
+
+    def test_broken_cursor_returns_first_page(self):
+        response = self.client.get(self.INDEX, {'cursor': 'not-a-cursor'})
+        self.assertEqual(len(response.context['page_obj']),
+                         settings.VIEW_COUNT)
+
+    def test_total_is_capped(self):
+        response = self.client.get(self.INDEX)
+        paginator = response.context['page_obj'].paginator
+        self.assertTrue(paginator.count_is_capped)
+        self.assertEqual(paginator.capped_count, 11)
+        self.assertContains(response, 'Всего записей: более 11')
@@ -0,0 +1,167 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+
+from about import urls as about_urls
+from posts import counters, feeds, groups
+from posts import api_urls
+from posts import urls as posts_urls
+from users import urls as users_urls
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+# Первые объёмы меньше страницы (VIEW_COUNT = 10): на них страницы
+# списков выводят разное число строк, и запрос на каждую строку (N+1)
+# меняет число запросов. Большие объёмы ловят запросы, зависящие от
+# размера таблиц.
+SIZES = (2, 5, 10, 100, 1000)
+
+# Сколько SQL-запросов может сделать страница. Бюджет не зависит от
+# объёма данных: рост числа запросов вместе с SIZES означает N+1.
+QUERY_BUDGETS = {
+    'posts:index': 6,
+    'posts:group_list': 6,
+    'posts:post_create': 2,
+    'posts:profile': 8,
+    'posts:post_detail': 6,
+    'posts:post_edit': 4,
+    'posts:add_comment': 3,
+    'posts:comments_more': 4,
+    'posts:follow_index': 6,
+    'posts:profile_follow': 4,
+    'posts:profile_unfollow': 11,
+    'posts:follow_bulk': 2,
+    'posts:export': 2,
+    'posts:search': 6,
+    'api:posts': 4,
+    'api:post_detail': 5,
+    'api:post_comments': 6,
+    'api:group_list': 0,
+    'api:group_posts': 4,
+    'api:author_posts': 6,
+    'api:feed': 6,
+    'about:author': 2,
+    'about:tech': 2,
+    'users:logout': 4,
+    'users:login': 2,
+    'users:signup': 2,
+    'users:password_reset_form': 0,
+}
+
+# GET-параметры, без которых маршрут не доходит до основной работы.
+ROUTE_PARAMS = {
+    'posts:search': {'q': 'Пост'},
+}
+
+
+def named_routes(module):
+    for pattern in module.urlpatterns:
+        if isinstance(pattern, URLPattern) and pattern.name:
+            yield (f'{module.app_name}:{pattern.name}',
+                   list(pattern.pattern.converters))
+
+
+class QueryBudgetTests(TestCase):
+    """Обход всех именованных маршрутов posts, about и users.
+
+    Для каждого маршрута число запросов на всех объёмах SIZES должно
+    совпадать и укладываться в QUERY_BUDGETS; итоговая таблица запросов
+    и времени печатается, чтобы регрессии было легко заметить.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.writer = User.objects.create_user(username='writer')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Описание тестовой группы',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Тестовый пост'
+        )
+        Follow.objects.create(user=cls.author, author=cls.writer)
+        cls.route_kwargs = {
+            'slug': cls.group.slug,
+            'username': cls.writer.username,
+            'post_id': cls.post.pk,
+            'table': 'posts',
+        }
+
+    def seed(self, size):
+        """Догрузить посты и комментарии до size штук."""
+        missing = size - Post.objects.count()
+        users = [
+            User(username=f'reader_{size}_{number}')
+            for number in range(missing)
+        ]
+        User.objects.bulk_create(users)
+        users = User.objects.filter(
+            username__startswith=f'reader_{size}_'
+        )
+        Post.objects.bulk_create(
+            Post(author=self.writer, group=self.group, text=f'Пост {number}')
+            for number in range(missing)
+        )
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=user, text='Комментарий')
+            for user in users
+        )
+        counters.recount()
+        feeds.rebuild()
+
+    def measure(self, name, converters):
+        client = Client()
+        client.force_login(self.author)
+        url = reverse(name, kwargs={
+            converter: self.route_kwargs[converter]
+            for converter in converters
+        })
+        cache.clear()
+        # Реестр групп прогрет, как в работающем процессе.
+        groups.all_groups()
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                client.get(url, ROUTE_PARAMS.get(name))
+                elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+        return len(queries), elapsed * 1000
+
+    def test_query_budgets(self):
+        routes = [
+            route
+            for module in (posts_urls, api_urls, about_urls, users_urls)
+            for route in named_routes(module)
+        ]
+        results = {name: [] for name, _ in routes}
+        for size in SIZES:
+            self.seed(size)
+            for name, converters in routes:
+                results[name].append(self.measure(name, converters))
+
+        rows = [f'{"view":<28}' + ''.join(
+            f'{f"q@{size}":>8}{f"ms@{size}":>9}' for size in SIZES
+        )]
+        for name, measurements in results.items():
+            rows.append(f'{name:<28}' + ''.join(
+                f'{count:>8}{elapsed:>9.1f}' for count, elapsed in measurements
+            ))
+        print('\n' + '\n'.join(rows))
+
+        for name, measurements in results.items():
+            counts = [count for count, _ in measurements]
+            with self.subTest(view=name, queries=counts):
+                self.assertIn(name, QUERY_BUDGETS,
+                              'Для нового маршрута нужен бюджет запросов')
+                self.assertEqual(len(set(counts)), 1,
+                                 'Число запросов растёт с объёмом данных')
+                self.assertLessEqual(counts[0], QUERY_BUDGETS[name])
@@ -0,0 +1,103 @@
+import re
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import AuthorStats, Comment, Follow, Group, Post
+
+User = get_user_model()
+
+FULL_SCAN = re.compile(r'^SCAN (?!subquery)\S+$')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN — SQLite')
+class QueryPlanTests(TestCase):
+    """Списки постов и комментариев должны читаться по индексам.
+
+    Для каждого SQL-запроса страницы выполняется EXPLAIN QUERY PLAN;
+    полный проход по таблице или сортировка во временном B-дереве
+    означают, что запрос перестал попадать в индекс.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.star = User.objects.create_user(username='star')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Описание тестовой группы',
+        )
+        for author in (cls.author, cls.star):
+            for number in range(3):
+                cls.post = Post.objects.create(
+                    author=author, group=cls.group, text=f'Пост {number}'
+                )
+        Comment.objects.create(post=cls.post, author=cls.reader, text='Ок')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Follow.objects.create(user=cls.reader, author=cls.star)
+        Follow.objects.create(user=cls.author, author=cls.star)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertIndexedPlans(self, url, data=None, allow_sort=False):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, data)
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or 'posts_' not in sql:
+                continue
+            plan = self.explain(sql)
+            sorts = any('TEMP B-TREE' in step for step in plan)
+            scans = any(FULL_SCAN.match(step) for step in plan)
+            with self.subTest(url=url, sql=sql, plan=plan):
+                self.assertFalse(
+                    scans, 'Запрос полностью сканирует таблицу'
+                )
+                if not allow_sort:
+                    self.assertFalse(
+                        sorts, 'Запрос сортирует во временном B-дереве'
+                    )
+
+    def listing_urls(self):
+        return [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:follow_index'),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:comments_more',
+                    kwargs={'post_id': self.post.pk}),
+        ]
+
+    def test_page_number_listings_use_indexes(self):
+        for url in self.listing_urls():
+            self.assertIndexedPlans(url, {'page': 1})
+
+    @override_settings(PAGINATION_MODE='cursor', VIEW_COUNT=2)
+    def test_cursor_listings_use_indexes(self):
+        for url in self.listing_urls()[:-2]:
+            page_obj = self.client.get(url).context['page_obj']
+            self.assertIndexedPlans(url)
+            self.assertIndexedPlans(url, {'cursor': page_obj.next_cursor})
+
+    def test_hybrid_follow_feed_does_not_scan(self):
+        # Гибридная лента сливает материализованные записи с постами
+        # популярных авторов, поэтому сортировка здесь допустима,
+        # а полный проход по таблице постов — нет.
+        AuthorStats.objects.filter(user=self.star).update(popular=True)
+        self.assertIndexedPlans(reverse('posts:follow_index'),
+                                allow_sort=True)
@@ -0,0 +1,111 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import rendering
+from posts.rendering import PREVIEW_LENGTH, make_preview
+from ..models import Follow, Post
+
+User = get_user_model()
+
+LONG_TEXT = 'слово ' * 200 + 'ХВОСТ'
+
+
+class MakePreviewTests(TestCase):
+    def test_short_text_is_kept(self):
+        self.assertEqual(make_preview('  Короткий\nпост  '),
+                         'Короткий\nпост')
+
+    def test_long_text_is_cut_on_word_boundary(self):
+        preview = make_preview(LONG_TEXT)
+        self.assertLessEqual(len(preview), PREVIEW_LENGTH + 1)
+        self.assertTrue(preview.endswith('слово…'))
+        self.assertNotIn('ХВОСТ', preview)
+
+    def test_single_long_word_is_cut_inside(self):
+        self.assertEqual(make_preview('а' * 20, length=10), 'а' * 10 + '…')
+
+
+class PostPreviewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.post = Post.objects.create(text=LONG_TEXT, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_save_fills_preview(self):
+        self.assertEqual(self.post.preview, make_preview(LONG_TEXT))
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Новый текст'
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEqual(post.preview, 'Новый текст')
+
+    def test_listings_show_preview_without_full_text(self):
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:follow_index'),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                post = response.context['page_obj'][0]
+                self.assertIn('text', post.get_deferred_fields())
+                self.assertContains(response, 'слово…')
+                self.assertNotContains(response, 'ХВОСТ')
+
+    def test_post_detail_shows_full_text(self):
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertContains(response, 'ХВОСТ')
+
+    def test_html_is_escaped_and_stored(self):
+        post = Post.objects.create(text='<b>жирный</b>\nвторая строка',
+                                   author=self.author)
+        self.assertEqual(post.text_html,
+                         '&lt;b&gt;жирный&lt;/b&gt;<br>вторая строка')
+        self.assertEqual(post.preview_html, post.text_html)
+        self.assertEqual(post.html_version, rendering.HTML_VERSION)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, post.preview_html, html=False)
+
+    def test_post_edit_renders_html(self):
+        self.client.force_login(self.author)
+        self.client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            {'text': 'Правка\nс переносом'},
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text_html, 'Правка<br>с переносом')
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertContains(response, 'Правка<br>с переносом')
+
+    def test_render_posts_updates_old_versions(self):
+        Post.objects.filter(pk=self.post.pk).update(
+            preview='', preview_html='', text_html='', html_version=0
+        )
+        out = StringIO()
+        call_command('render_posts', stdout=out)
+        self.assertIn('Перерисовано статей: 1', out.getvalue())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.preview, make_preview(LONG_TEXT))
+        self.assertEqual(self.post.text_html, rendering.to_html(LONG_TEXT))
+        self.assertEqual(self.post.html_version, rendering.HTML_VERSION)
+        out = StringIO()
+        call_command('render_posts', '--all', stdout=out)
+        self.assertIn('Перерисовано статей: 0', out.getvalue())
@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import search
+from ..models import Post
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='searcher')
+        cls.other = User.objects.create_user(username='someone')
+        cls.best = Post.objects.create(
+            author=cls.user, text='Кошка, кошка, <b>кошка</b>'
+        )
+        cls.plain = Post.objects.create(
+            author=cls.user, text='Собака встретила кошку во дворе'
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.other, text=f'Кошка номер {number}')
+            for number in range(12)
+        )
+        Post.objects.create(author=cls.other, text='Ничего общего')
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_index_follows_updates_and_deletes(self):
+        self.assertTrue(Post.objects.filter(
+            pk__in=search.matching_ids('собака')
+        ).exists())
+        self.plain.text = 'Лошадь'
+        self.plain.save()
+        self.assertFalse(Post.objects.filter(
+            pk__in=search.matching_ids('собака')
+        ).exists())
+        Post.objects.filter(pk=self.plain.pk).delete()
+        self.assertFalse(Post.objects.filter(
+            pk__in=search.matching_ids('лошадь')
+        ).exists())
+
+    def test_search_ranks_escapes_and_paginates(self):
+        response = self.client.get(reverse('posts:search'), {'q': 'кошка'})
+        page = response.context['page_obj']
+        self.assertEqual(page[0], self.best)
+        self.assertIn('<mark>Кошка</mark>', page[0].snippet)
+        self.assertIn('&lt;b&gt;', page[0].snippet)
+        self.assertTrue(page.has_next())
+        seen = [post.pk for post in page]
+        response = self.client.get(
+            reverse('posts:search'), {'q': 'кошка', 'cursor': page.next_cursor}
+        )
+        seen += [post.pk for post in response.context['page_obj']]
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(len(seen), 13)
+
+    def test_search_prefix_and_fts_syntax(self):
+        self.assertEqual(
+            len(search.search_posts('кош', 20)), 14
+        )
+        response = self.client.get(
+            reverse('posts:search'), {'q': 'NEAR( "кошка" * :'}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_search_finds_users(self):
+        response = self.client.get(reverse('posts:search'), {'q': 'search'})
+        self.assertEqual(list(response.context['users']), [self.user])
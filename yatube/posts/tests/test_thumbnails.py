@@ -0,0 +1,100 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from posts.thumbnails import generate
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.post = Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF, content_type='image/gif'
+            ),
+        )
+
+    def test_original_is_shown_until_thumbnail_is_ready(self):
+        self.assertEqual(self.post.thumbnail_urls, {})
+        self.assertEqual(self.post.card_image_url, self.post.image.url)
+
+    def test_generate_stores_url_map(self):
+        urls = generate(self.post.pk)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.thumbnail_urls, urls)
+        self.assertEqual(self.post.card_image_url,
+                         urls[Post.CARD_THUMBNAIL])
+        response = Client().get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertContains(response, urls[Post.CARD_THUMBNAIL])
+
+    def test_new_image_resets_thumbnails(self):
+        generate(self.post.pk)
+        self.post.refresh_from_db()
+        self.post.image = SimpleUploadedFile(
+            name='other.gif', content=SMALL_GIF, content_type='image/gif'
+        )
+        self.post.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.thumbnail_urls, {})
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_ASYNC=False)
+class GenerateThumbnailsCommandTests(TransactionTestCase):
+    # Пул потоков команды работает через свои соединения с БД и видит
+    # только закоммиченные данные.
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_backfill_command(self):
+        post = Post.objects.create(
+            author=User.objects.create_user(username='user'),
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF, content_type='image/gif'
+            ),
+        )
+        post.refresh_from_db()
+        self.assertIn(Post.CARD_THUMBNAIL, post.thumbnail_urls)
+        Post.objects.update(thumbnails='')
+        call_command('generate_thumbnails', '--workers=2', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertIn(Post.CARD_THUMBNAIL, post.thumbnail_urls)
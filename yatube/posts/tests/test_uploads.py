@@ -0,0 +1,128 @@
+import io
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import uploads
+from posts.forms import PostForm
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(size=(300, 120), image_format='JPEG', exif=True):
+    image = Image.new('RGB', size, 'red')
+    buffer = io.BytesIO()
+    options = {}
+    if exif:
+        data = Image.Exif()
+        data[0x010F] = 'Камера'.encode()  # Make
+        data[0x0112] = 6  # Orientation: повернуть на 90°
+        options['exif'] = data.tobytes()
+    image.save(buffer, format=image_format, **options)
+    return buffer.getvalue()
+
+
+def upload(content, name='photo.jpg'):
+    return SimpleUploadedFile(name, content, content_type='image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, IMAGE_MAX_SIDE=100)
+class UploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create(self, content):
+        client = Client()
+        client.force_login(self.user)
+        client.post(reverse('posts:post_create'), {
+            'text': 'Пост с картинкой', 'image': upload(content),
+        })
+        return Post.objects.latest('pk')
+
+    def test_identical_uploads_share_one_file(self):
+        content = make_image()
+        first = self.create(content)
+        second = self.create(content)
+        self.assertTrue(first.image.name.startswith(uploads.UPLOAD_PREFIX))
+        self.assertEqual(first.image.name, second.image.name)
+
+    def test_upload_during_processing_gets_processed_file(self):
+        content = make_image(size=(200, 80))
+        first = self.create(content)
+        # process() уже сохранил результат, но оригинал ещё не удалил.
+        done = uploads.output_name(uploads.content_hash(upload(content)))
+        default_storage.save(done, io.BytesIO(b'done'))
+        self.addCleanup(default_storage.delete, done)
+        self.assertTrue(default_storage.exists(first.image.name))
+        self.assertEqual(self.create(content).image.name, done)
+
+    def test_post_saved_after_original_was_deleted_is_switched(self):
+        content = make_image(size=(220, 90))
+        first = self.create(content)
+        original = first.image.name
+        # Второй пост сослался на оригинал, пока первый перекодировали.
+        second = self.create(content)
+        self.assertEqual(second.image.name, original)
+        Post.objects.filter(pk=second.pk).update(image='posts/other.jpg')
+        target = uploads.process(first.pk)
+        self.addCleanup(default_storage.delete, target)
+        self.assertFalse(default_storage.exists(original))
+        Post.objects.filter(pk=second.pk).update(image=original)
+        self.assertEqual(uploads.process(second.pk), target)
+        second.refresh_from_db()
+        self.assertEqual(second.image.name, target)
+
+    def test_process_resizes_rotates_and_strips_metadata(self):
+        post = self.create(make_image(size=(300, 120)))
+        original = post.image.name
+        name = uploads.process(post.pk)
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, name)
+        self.assertFalse(default_storage.exists(original))
+        with default_storage.open(name) as file, Image.open(file) as image:
+            self.assertEqual(image.format, 'JPEG')
+            # Ориентация из EXIF применена: картинка стала вертикальной.
+            self.assertEqual(image.size, (40, 100))
+            self.assertEqual(len(image.getexif()), 0)
+        self.assertIsNone(uploads.process(post.pk))
+        # Та же загрузка сразу получает готовый файл.
+        again = self.create(make_image(size=(300, 120)))
+        self.assertEqual(again.image.name, name)
+
+    @override_settings(IMAGE_FORMAT='WEBP')
+    def test_webp_output(self):
+        post = self.create(make_image(image_format='PNG', exif=False))
+        name = uploads.process(post.pk)
+        self.assertTrue(name.endswith('.webp'))
+        with default_storage.open(name) as file, Image.open(file) as image:
+            self.assertEqual(image.format, 'WEBP')
+
+    @override_settings(IMAGE_UPLOAD_MAX_PIXELS=1000)
+    def test_too_many_pixels_rejected_by_header(self):
+        form = PostForm({'text': 'Текст'},
+                        {'image': upload(make_image(size=(100, 100)))})
+        self.assertFalse(form.is_valid())
+        self.assertIn('100×100', form.errors['image'][0])
+
+    @override_settings(IMAGE_UPLOAD_MAX_BYTES=100)
+    def test_too_large_file_rejected(self):
+        form = PostForm({'text': 'Текст'}, {'image': upload(make_image())})
+        self.assertFalse(form.is_valid())
+        self.assertIn('image', form.errors)
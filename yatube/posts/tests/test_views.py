@@ -4,6 +4,7 @@ from django.urls import reverse
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 
+from posts import rendering
 from posts.forms import PostForm
 from ..models import Group, Follow, Post
 
@@ -112,19 +113,46 @@ class PostViewsTests(TestCase):
 
     def test_cache(self):
         post = Post.objects.create(
-            text='text',
+            text='Текст до правки',
             author=self.user,
             group=self.group
         )
-        response = self.authorized_client.get(reverse('posts:index'))
-        response_post = response.context['page_obj'][0]
-        self.assertEqual(post, response_post)
-        post.delete()
-        response_2 = self.authorized_client.get(reverse('posts:index'))
-        self.assertEqual(response.content, response_2.content)
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        ]
+        for url in urls:
+            self.authorized_client.get(url)
+        # update() не меняет updated_at, поэтому фрагмент берётся из кеша
+        Post.objects.filter(pk=post.pk).update(text='Текст после правки')
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertContains(response, 'Текст до правки')
+        post.refresh_from_db()
+        post.save()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertContains(response, 'Текст после правки')
+        # Лента показывает готовый HTML анонса, а update() его не
+        # пересчитывает.
+        Post.objects.filter(pk=post.pk).update(
+            text='Текст без кеша', **rendering.render('Текст без кеша')
+        )
         cache.clear()
-        response_3 = self.authorized_client.get(reverse('posts:index'))
-        self.assertNotEqual(response.content, response_3.content)
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Текст без кеша')
+
+    def test_cache_invalidated_on_author_rename(self):
+        author = User.objects.create_user(username='author')
+        Post.objects.create(text='Пост автора', author=author)
+        self.authorized_client.get(reverse('posts:index'))
+        author.username = 'renamed_user'
+        author.save()
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Автор: renamed_user')
 
 
 class FollowTests(TestCase):
@@ -0,0 +1,87 @@
+"""Предварительная генерация миниатюр картинок постов.
+
+Миниатюры всех известных геометрий создаются в фоновом пуле потоков
+после сохранения поста, а их адреса складываются в Post.thumbnails.
+Свежая загрузка перед этим перекодируется (posts.uploads.process).
+Шаблоны только читают готовый адрес и не вызывают sorl во время
+рендеринга.
+"""
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from sorl.thumbnail import get_thumbnail
+
+from posts import uploads, versions
+from posts.models import Post
+
+logger = logging.getLogger(__name__)
+
+GEOMETRIES = {
+    Post.CARD_THUMBNAIL: {'crop': 'center', 'upscale': True},
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+    return _executor
+
+
+def generate(post_id):
+    """Создать миниатюры поста и сохранить их адреса.
+
+    Возвращает словарь {геометрия: url} или None, если картинки нет.
+    """
+    post = Post.objects.filter(pk=post_id).only(
+        'image', 'author_id', 'group_id'
+    ).first()
+    if post is None or not post.image:
+        return None
+    urls = {
+        geometry: get_thumbnail(post.image, geometry, **options).url
+        for geometry, options in GEOMETRIES.items()
+    }
+    # Картинку могли заменить, пока миниатюры считались.
+    updated = Post.objects.filter(pk=post_id, image=post.image.name).update(
+        thumbnails=json.dumps(urls),
+        updated_at=timezone.now(),
+    )
+    if updated:
+        versions.bump(*versions.post_scopes(post.author_id, post.group_id))
+    return urls
+
+
+def prepare(post_id):
+    """Перекодировать загрузку, если нужно, и создать миниатюры."""
+    uploads.process(post_id)
+    return generate(post_id)
+
+
+def _run(post_id):
+    try:
+        prepare(post_id)
+    except Exception:
+        logger.exception('Не удалось создать миниатюры поста %s', post_id)
+    finally:
+        close_old_connections()
+
+
+def schedule(post_id):
+    """Поставить пост в очередь на генерацию после коммита транзакции."""
+    if settings.THUMBNAIL_ASYNC:
+        transaction.on_commit(lambda: executor().submit(_run, post_id))
+    else:
+        transaction.on_commit(lambda: prepare(post_id))
@@ -0,0 +1,156 @@
+"""Приём картинок постов: проверка, имена по содержимому, перекодирование.
+
+Загрузка пишется во временный файл (FILE_UPLOAD_HANDLERS), форма
+проверяет размер файла и размеры картинки по заголовку, не декодируя
+пиксели. Оригинал сохраняется под именем из SHA-256 содержимого, так что
+одинаковые загрузки занимают место один раз. Перекодирование — после
+коммита, в пуле posts.thumbnails: картинка поворачивается по EXIF,
+уменьшается до IMAGE_MAX_SIDE, теряет метаданные и сохраняется в
+IMAGE_FORMAT не больше IMAGE_MAX_BYTES; оригинал после этого удаляется.
+"""
+import hashlib
+import io
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from posts import versions
+from posts.models import Post
+
+# Имя оригинала, который ещё не перекодирован.
+UPLOAD_PREFIX = 'posts/upload-'
+EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png', 'GIF': '.gif', 'WEBP': '.webp'}
+# Ниже этого качества уменьшать файл уже не стоит.
+MIN_QUALITY = 50
+QUALITY_STEP = 10
+
+
+def _storage():
+    return Post._meta.get_field('image').storage
+
+
+def inspect(file):
+    """(формат, ширина, высота) по заголовку, без декодирования."""
+    file.seek(0)
+    try:
+        with Image.open(file) as image:
+            return (image.format,) + image.size
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError('Файл не похож на картинку.')
+    finally:
+        file.seek(0)
+
+
+def validate(file):
+    if file.size > settings.IMAGE_UPLOAD_MAX_BYTES:
+        raise ValidationError(
+            f'Файл больше {settings.IMAGE_UPLOAD_MAX_BYTES // 2 ** 20} МБ.'
+        )
+    image_format, width, height = inspect(file)
+    if image_format not in EXTENSIONS:
+        raise ValidationError(
+            f'Поддерживаются форматы: {", ".join(EXTENSIONS)}.'
+        )
+    if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+        raise ValidationError(f'Слишком большая картинка: {width}×{height}.')
+
+
+def content_hash(file):
+    sha = hashlib.sha256()
+    file.seek(0)
+    for chunk in file.chunks():
+        sha.update(chunk)
+    file.seek(0)
+    return sha.hexdigest()
+
+
+def output_name(digest):
+    return f'posts/{digest}{EXTENSIONS[settings.IMAGE_FORMAT]}'
+
+
+def store(file):
+    """Сохранить загрузку и вернуть имя для Post.image.
+
+    Если такую же картинку уже загружали и перекодировали, возвращается
+    готовый файл, и перекодировать ничего не нужно.
+    """
+    digest = content_hash(file)
+    storage = _storage()
+    done = output_name(digest)
+    if storage.exists(done):
+        return done
+    name = f'{UPLOAD_PREFIX}{digest}{EXTENSIONS[inspect(file)[0]]}'
+    if storage.exists(name):
+        # Оригинал могут как раз перекодировать: process() сохраняет
+        # результат до удаления оригинала, поэтому проверяем его ещё раз.
+        return done if storage.exists(done) else name
+    return storage.save(name, file)
+
+
+def _flatten(image):
+    # У JPEG нет прозрачности: прозрачные места становятся белыми.
+    if image.mode in ('RGBA', 'LA') or 'transparency' in image.info:
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def encode(source):
+    """Перекодированная картинка: bytes в IMAGE_FORMAT без метаданных."""
+    side = settings.IMAGE_MAX_SIDE
+    with Image.open(source) as image:
+        # JPEG декодируется сразу в уменьшенном масштабе.
+        image.draft('RGB', (side, side))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((side, side), Image.LANCZOS)
+        if settings.IMAGE_FORMAT == 'JPEG':
+            image = _flatten(image)
+        elif image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        quality = settings.IMAGE_QUALITY
+        while True:
+            buffer = io.BytesIO()
+            image.save(buffer, format=settings.IMAGE_FORMAT,
+                       quality=quality, optimize=True)
+            if (buffer.tell() <= settings.IMAGE_MAX_BYTES
+                    or quality <= MIN_QUALITY):
+                return buffer.getvalue()
+            quality -= QUALITY_STEP
+
+
+def process(post_id):
+    """Перекодировать оригинал картинки поста.
+
+    Возвращает новое имя или None, если перекодировать нечего. Все посты
+    с тем же оригиналом переключаются на результат сразу. Пост, который
+    сохранили с тем же оригиналом уже после этого, мог остаться со
+    ссылкой на удалённый файл; его собственный process() найдёт готовый
+    результат и переключит пост на него без оригинала.
+    """
+    name = Post.objects.filter(pk=post_id).values_list(
+        'image', flat=True
+    ).first()
+    if not name or not name.startswith(UPLOAD_PREFIX):
+        return None
+    storage = _storage()
+    digest = name[len(UPLOAD_PREFIX):].rsplit('.', 1)[0]
+    target = output_name(digest)
+    if not storage.exists(target):
+        if not storage.exists(name):
+            return None
+        with storage.open(name) as source:
+            target = storage.save(target, ContentFile(encode(source)))
+    posts = Post.objects.filter(image=name)
+    scopes = set()
+    for author_id, group_id in posts.values_list('author_id', 'group_id'):
+        scopes.update(versions.post_scopes(author_id, group_id))
+    posts.update(image=target, thumbnails='', updated_at=timezone.now())
+    versions.bump(*scopes)
+    if not Post.objects.filter(image=name).exists():
+        storage.delete(name)
+    return target
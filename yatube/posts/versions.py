@@ -0,0 +1,156 @@
+"""Версии областей данных и валидаторы для условных GET-запросов.
+
+Страница списка зависит от одной области: index — от всей ленты,
+group_list — от группы, profile — от автора. Пока версия области не
+изменилась, страница тоже не изменилась, и condition() отвечает 304 без
+основных запросов и рендеринга шаблона. В ETag входит пользователь:
+шапка сайта и кнопка подписки у каждого свои.
+"""
+import hashlib
+
+from django.db.models import F
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from core import pagecache
+from posts import counters
+from posts.models import Post, ScopeVersion
+
+GLOBAL = 'posts'
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def author_scope(author_id):
+    return f'author:{author_id}'
+
+
+def follower_scope(user_id):
+    """Подписки пользователя: от них зависят отметки в лентах."""
+    return f'follower:{user_id}'
+
+
+def post_scope(post_id):
+    """Страница поста. Версий у неё нет: тег только для core.pagecache."""
+    return f'post:{post_id}'
+
+
+def post_scopes(author_id, group_id):
+    """Области, в которых виден пост с таким автором и группой."""
+    scopes = [GLOBAL, author_scope(author_id)]
+    if group_id is not None:
+        scopes.append(group_scope(group_id))
+    return scopes
+
+
+def bump(*scopes):
+    """Новая версия областей; заодно сбрасываются их число записей и
+    закешированные страницы."""
+    scopes = set(scopes)
+    if not scopes:
+        return
+    counters.forget_page_counts(scopes)
+    pagecache.purge(*scopes)
+    now = timezone.now()
+    ScopeVersion.objects.filter(scope__in=scopes).update(
+        version=F('version') + 1, changed_at=now
+    )
+    # Областей, которых ещё нет, update() не коснулся.
+    ScopeVersion.objects.bulk_create(
+        [ScopeVersion(scope=scope, version=1, changed_at=now)
+         for scope in scopes],
+        ignore_conflicts=True,
+    )
+
+
+def stamps(scopes):
+    """{область: (версия, время изменения)}, для новых — (0, None)."""
+    found = {
+        scope: (version, changed_at)
+        for scope, version, changed_at in ScopeVersion.objects.filter(
+            scope__in=scopes
+        ).values_list('scope', 'version', 'changed_at')
+    }
+    return {scope: found.get(scope, (0, None)) for scope in scopes}
+
+
+def _make_validators(request, parts, dates):
+    user = request.user.pk if request.user.is_authenticated else 0
+    raw = '|'.join(str(part) for part in (*parts, user))
+    dates = [date for date in dates if date is not None]
+    return (
+        hashlib.md5(raw.encode()).hexdigest(),
+        max(dates) if dates else None,
+    )
+
+
+def _validators(request, compute, kwargs):
+    # condition() спрашивает ETag и Last-Modified по отдельности;
+    # считаем их один раз на запрос.
+    if not hasattr(request, '_validators'):
+        request._validators = compute(request, **kwargs)
+    return request._validators
+
+
+def conditional(compute):
+    """condition() с ETag и Last-Modified из одной функции compute.
+
+    compute(request, **kwargs) возвращает пару (etag, last_modified)
+    или (None, None), если валидаторов нет.
+    """
+    return condition(
+        etag_func=lambda request, **kwargs: _validators(
+            request, compute, kwargs
+        )[0],
+        last_modified_func=lambda request, **kwargs: _validators(
+            request, compute, kwargs
+        )[1],
+    )
+
+
+def scopes_validators(request, scopes):
+    """(ETag, Last-Modified) страницы, зависящей от областей scopes."""
+    found = stamps(scopes)
+    parts = []
+    for item in scopes:
+        parts += [item, found[item][0]]
+    return _make_validators(
+        request, parts, [found[item][1] for item in scopes]
+    )
+
+
+def scope_validators(scope_func):
+    """compute() для страниц одной области: scope_func(**kwargs) -> scope.
+
+    Для вошедшего пользователя учитываются и его подписки: лента
+    отмечает посты авторов, на которых он подписан.
+    """
+    def compute(request, **kwargs):
+        scope = scope_func(**kwargs)
+        if scope is None:
+            return None, None
+        scopes = [scope]
+        if request.user.is_authenticated:
+            scopes.append(follower_scope(request.user.pk))
+        return scopes_validators(request, scopes)
+    return compute
+
+
+def post_validators(request, post_id):
+    """Пост: updated_at, число комментариев, версии автора и группы."""
+    post = Post.objects.filter(pk=post_id).values(
+        'updated_at', 'comments_count', 'author_id', 'group_id'
+    ).first()
+    if post is None:
+        return None, None
+    scopes = post_scopes(post['author_id'], post['group_id'])[1:]
+    versions = stamps(scopes)
+    return _make_validators(
+        request,
+        [post_id, post['updated_at'].isoformat(), post['comments_count'],
+         *(versions[scope][0] for scope in scopes)],
+        [post['updated_at'],
+         *(versions[scope][1] for scope in scopes)],
+    )
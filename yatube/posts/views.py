@@ -1,78 +1,167 @@
 from django.conf import settings
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
+from django.views.decorators.http import require_POST
 
+from core import pagecache
+from core.db_router import replica_reads
+from posts import export as exporter
+from posts import counters, follows, groups, queries
+from posts.counters import stats_of
+from posts.feeds import as_posts
 from posts.forms import CommentForm, PostForm
-from posts.models import Group, Post, Follow
+from posts.models import Post
+from posts.paginators import CountedPaginator, CursorPaginator
+from posts.search import matching_users, search_posts
+from posts.versions import (GLOBAL, author_scope, conditional,
+                            follower_scope, group_scope, post_scope,
+                            post_scopes, post_validators, scope_validators)
 
 User = get_user_model()
 
 
-def page_look(post_list, page_number):
-    paginator = Paginator(post_list, settings.VIEW_COUNT)
-    page_obj = paginator.get_page(page_number)
+def page_look(post_list, request, scope=None, count_timeout=None):
+    # scope — область версий (posts.versions), по которой кешируется
+    # число записей для номеров страниц.
+    cursor = request.GET.get('cursor')
+    use_cursor = cursor is not None or (
+        settings.PAGINATION_MODE == 'cursor' and 'page' not in request.GET
+    )
+    if use_cursor:
+        paginator = CursorPaginator(post_list, settings.VIEW_COUNT,
+                                    count_cap=settings.PAGINATION_COUNT_CAP)
+        return paginator.get_page(cursor)
+    count = None
+    if scope is not None:
+        count = counters.page_count(scope, post_list, count_timeout)
+    paginator = CountedPaginator(post_list, settings.VIEW_COUNT, count=count)
+    page_obj = paginator.get_page(request.GET.get('page'))
     return page_obj
 
 
+@replica_reads
+@conditional(scope_validators(lambda: GLOBAL))
 def index(request):
-    post_list = Post.objects.select_related('author', 'group')
-    page_obj = page_look(post_list, request.GET.get('page'))
+    post_list = queries.listing(queries.index_posts())
+    page_obj = page_look(post_list, request, scope=GLOBAL)
+    page_obj.object_list = groups.attach(page_obj)
     context = {
         'page_obj': page_obj,
     }
-    return render(request, 'posts/index.html', context)
+    return pagecache.tag(render(request, 'posts/index.html', context),
+                         GLOBAL)
 
 
+@replica_reads
+@conditional(scope_validators(queries.scope_of_author))
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    author_posts = author.posts.select_related('group')
-    page_obj = page_look(author_posts, request.GET.get('page'))
-    if request.user.is_authenticated:
-        following = Follow.objects.filter(
-            user=request.user, author=author
-        ).exists()
-    else:
-        following = False
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    post_list = queries.listing(queries.author_posts(author))
+    page_obj = page_look(post_list, request, scope=author_scope(author.pk))
+    page_obj.object_list = groups.attach(page_obj)
+    following = author.pk in follows.following_ids(request.user)
     context = {
         'author': author,
+        'posts_count': stats_of(author).posts_count,
         'page_obj': page_obj,
         'following': following,
     }
-    return render(request, 'posts/profile.html', context)
+    return pagecache.tag(render(request, 'posts/profile.html', context),
+                         author_scope(author.pk))
 
 
+@replica_reads
+@conditional(post_validators)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    posts_count = post.author.posts.count()
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group').defer(
+            'text', 'preview', 'preview_html'
+        ),
+        pk=post_id
+    )
+    posts_count = stats_of(post.author).posts_count
     form = CommentForm(request.POST or None)
-    comments = post.comments.all()
+    comments = CursorPaginator(
+        queries.post_comments(post.pk).select_related('author'),
+        settings.COMMENTS_COUNT
+    ).get_page(request.GET.get('cursor'))
     context = {
         'post': post,
         'posts_count': posts_count,
         'form': form,
         'comments': comments,
     }
-    return render(request, 'posts/post_detail.html', context)
+    return pagecache.tag(
+        render(request, 'posts/post_detail.html', context),
+        post_scope(post.pk), *post_scopes(post.author_id, post.group_id)[1:]
+    )
+
+
+@replica_reads
+def comments_more(request, post_id):
+    # Следующие страницы комментариев для кнопки «Показать ещё»
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    comment_list = queries.post_comments(post_id).values(
+        'id', 'text', 'created', 'author__username'
+    )
+    page = CursorPaginator(comment_list, settings.COMMENTS_COUNT).get_page(
+        request.GET.get('cursor')
+    )
+    return JsonResponse({
+        'comments': [
+            {
+                'id': comment['id'],
+                'author': comment['author__username'],
+                'text': comment['text'],
+                'created': comment['created'],
+            }
+            for comment in page
+        ],
+        'next_cursor': page.next_cursor,
+    })
 
 
+@replica_reads
+@conditional(scope_validators(queries.scope_of_group))
 def group_list(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related('author')
-    page_obj = page_look(post_list, request.GET.get('page'))
+    group = groups.by_slug(slug)
+    if group is None:
+        raise Http404
+    post_list = queries.listing(queries.group_posts(group))
+    page_obj = page_look(post_list, request, scope=group_scope(group.pk))
     context = {
         'group': group,
         'page_obj': page_obj,
     }
-    return render(request, 'posts/group_list.html', context)
+    return pagecache.tag(render(request, 'posts/group_list.html', context),
+                         group_scope(group.pk))
+
+
+@replica_reads
+def search(request):
+    query = request.GET.get('q', '')
+    page_obj = search_posts(query, settings.VIEW_COUNT,
+                            cursor=request.GET.get('cursor'))
+    page_obj.object_list = groups.attach(page_obj)
+    context = {
+        'query': query,
+        'users': matching_users(query),
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
 
 
 @login_required
 def post_create(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         post_create = form.save(commit=False)
         post_create.author = request.user
@@ -119,10 +208,14 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@replica_reads
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    page_obj = page_look(post_list, request)
+    post_list = queries.listing(queries.feed_posts(request.user))
+    page_obj = page_look(post_list, request,
+                         scope=follower_scope(request.user.pk),
+                         count_timeout=settings.FEED_PAGE_COUNT_TIMEOUT)
+    page_obj.object_list = groups.attach(as_posts(page_obj))
     context = {
         'page_obj': page_obj
     }
@@ -132,11 +225,8 @@ def follow_index(request):
 @login_required
 def profile_follow(request, username):
     # Подписаться на автора
-    user = request.user
-    author = User.objects.get(username=username)
-    is_follower = Follow.objects.filter(user=user, author=author)
-    if user != author and not is_follower.exists():
-        Follow.objects.create(user=user, author=author)
+    author = get_object_or_404(User, username=username)
+    follows.follow(request.user, [author.pk])
     return redirect(reverse('posts:profile', args=[username]))
 
 
@@ -144,7 +234,52 @@ def profile_follow(request, username):
 def profile_unfollow(request, username):
     # Дизлайк, отписка
     author = get_object_or_404(User, username=username)
-    is_follower = Follow.objects.filter(user=request.user, author=author)
-    if is_follower.exists():
-        is_follower.delete()
+    follows.unfollow(request.user, [author.pk])
     return redirect('posts:profile', username=author)
+
+
+@login_required
+@require_POST
+def follow_bulk(request):
+    # Подписка или отписка сразу от многих авторов: POST authors=<username>
+    # (поле повторяется) и action=follow|unfollow
+    action = request.POST.get('action')
+    usernames = set(request.POST.getlist('authors'))
+    if action not in ('follow', 'unfollow'):
+        return JsonResponse({'error': 'action: follow или unfollow'},
+                            status=400)
+    if len(usernames) > follows.BULK_LIMIT:
+        return JsonResponse(
+            {'error': f'не больше {follows.BULK_LIMIT} авторов за раз'},
+            status=400,
+        )
+    authors = dict(User.objects.filter(
+        username__in=usernames
+    ).values_list('pk', 'username'))
+    change = follows.follow if action == 'follow' else follows.unfollow
+    changed = change(request.user, authors)
+    return JsonResponse({
+        'action': action,
+        'changed': sorted(authors[pk] for pk in changed),
+        'unknown': sorted(usernames - set(authors.values())),
+    })
+
+
+@staff_member_required
+def export(request, table):
+    # Выгрузка таблицы потоком: память не зависит от размера таблицы
+    file_format = request.GET.get('format', 'jsonl')
+    if table not in exporter.TABLES or file_format not in exporter.FORMATS:
+        raise Http404
+    content_type = {
+        'jsonl': 'application/x-ndjson',
+        'csv': 'text/csv',
+    }[file_format]
+    response = StreamingHttpResponse(
+        exporter.lines(table, file_format),
+        content_type=f'{content_type}; charset=utf-8',
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{table}.{file_format}"'
+    )
+    return response
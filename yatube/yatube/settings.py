@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -50,6 +51,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ProfilingMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
+    'core.middleware.PageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -73,6 +77,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.follows.following',
             ],
         },
     },
@@ -84,13 +89,47 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Постоянные соединения: одно на поток, живёт CONN_MAX_AGE секунд.
+CONN_MAX_AGE = int(os.environ.get('YATUBE_CONN_MAX_AGE', 60))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+    }
+}
+
+# Реплики только для чтения: пути к копиям базы SQLite через запятую в
+# YATUBE_REPLICAS. В тестах реплики зеркалят основную базу.
+DATABASE_REPLICAS = []
+for number, name in enumerate(
+        filter(None, os.environ.get('YATUBE_REPLICAS', '').split(',')), 1):
+    DATABASES[f'replica_{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'TEST': {'MIRROR': 'default'},
     }
+    DATABASE_REPLICAS.append(f'replica_{number}')
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+
+# Прагмы для каждого нового соединения с SQLite (core.sqlite), по порядку.
+# busy_timeout стоит первым, чтобы переключение в WAL могло подождать
+# чужую блокировку.
+SQLITE_PRAGMAS = {
+    'busy_timeout': 5000,
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'temp_store': 'MEMORY',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
 }
 
+# Сколько секунд после записи клиент читает только с основной базы.
+REPLICA_STICKY_SECONDS = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -141,7 +180,106 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 VIEW_COUNT = 10
 
+COMMENTS_COUNT = 50
+
+# 'pages' — классические ?page=N, 'cursor' — keyset-пагинация ?cursor=...
+# Ссылки вида ?page=N работают в обоих режимах.
+PAGINATION_MODE = 'pages'
+
+# Сколько записей максимум считать для «Всего записей» в режиме cursor;
+# None отключает подсчёт.
+PAGINATION_COUNT_CAP = 1000
+
+# Сколько секунд хранится число записей ленты подписок: новые посты
+# авторов не меняют версию области подписчика (posts.versions).
+FEED_PAGE_COUNT_TIMEOUT = 60
+
+# Посты авторов, у которых подписчиков больше этого числа, не раскладываются
+# по лентам при публикации, а подтягиваются в follow_index при чтении.
+FEED_FANOUT_LIMIT = 1000
+# К раскладке автор возвращается, только когда подписчиков становится не
+# больше FEED_FANOUT_LIMIT - FEED_FANOUT_MARGIN, и только командой
+# rebuild_feeds --popular (её стоит запускать по расписанию).
+FEED_FANOUT_MARGIN = 100
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Миниатюры картинок постов создаются в фоновом пуле потоков после
+# сохранения поста; THUMBNAIL_ASYNC = False генерирует их сразу после
+# коммита в том же потоке.
+THUMBNAIL_ASYNC = True
+THUMBNAIL_WORKERS = 2
+
+# Загрузка картинок постов (posts.uploads). Файл пишется во временный
+# файл, а не в память; больше этих пределов форма не принимает.
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+IMAGE_UPLOAD_MAX_BYTES = 20 * 1024 * 1024
+IMAGE_UPLOAD_MAX_PIXELS = 50 * 1000 * 1000
+# Перекодированная картинка: длинная сторона, качество, формат (JPEG или
+# WEBP) и предел размера файла, ради которого снижается качество.
+IMAGE_MAX_SIDE = 2048
+IMAGE_QUALITY = 85
+IMAGE_FORMAT = 'JPEG'
+IMAGE_MAX_BYTES = 1024 * 1024
+
+# Кеш страниц, фрагментов и счётчиков (core.cache.TwoLevelCache): LRU в
+# памяти воркера на LOCAL_TIMEOUT секунд перед общим файловым кешем в
+# CACHE_DIR. Подписки (follows:) читаются только из общего уровня: после
+# подписки пользователь может попасть в другой воркер. Сроки хранения
+# задают все вызовы, поэтому у общего уровня TIMEOUT = None.
+CACHE_DIR = os.environ.get(
+    'YATUBE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'yatube-cache')
+)
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.TwoLevelCache',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'SHARED': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': CACHE_DIR,
+                'TIMEOUT': None,
+                'OPTIONS': {'MAX_ENTRIES': 20000},
+            },
+            'SHARED_ONLY': ['follows:', 'page-tag:'],
+            'LOCAL_MAX_ENTRIES': 2000,
+            'LOCAL_TIMEOUT': 5,
+            # XFetch: больше BETA — раньше пересчёт.
+            'BETA': 1.0,
+            'LOCK_TIMEOUT': 30,
+            'LOCK_WAIT': 5,
+        },
+    },
+}
+# Кеш страниц для анонимных посетителей (core.pagecache): представление ->
+# параметры запроса, которые входят в ключ. Остальные параметры ключ не
+# меняют, поэтому представление не должно от них зависеть.
+PAGE_CACHE_VIEWS = {
+    'posts:index': ('page', 'cursor'),
+    'posts:group_list': ('page', 'cursor'),
+    'posts:profile': ('page', 'cursor'),
+    'posts:post_detail': ('cursor',),
+}
+# Записи сносятся при изменении постов, комментариев и групп; срок лишь
+# страхует от потерянной зависимости.
+PAGE_CACHE_TIMEOUT = 300
+# С этими cookie запрос идёт мимо кеша: вошедший пользователь, сообщения
+# после действия, чтение с основной базы после записи.
+PAGE_CACHE_BYPASS_COOKIES = ['sessionid', 'messages', 'primary_sticky']
+
+# manage.py test подменяет кеш и выключает кеш страниц (core.testing).
+TEST_RUNNER = 'core.testing.TestRunner'
+
+# Профилирование запросов (core.middleware.ProfilingMiddleware): всегда
+# при PROFILING_ENABLED, иначе для доли запросов PROFILING_SAMPLE_RATE.
+PROFILING_ENABLED = False
+PROFILING_SAMPLE_RATE = 0.0
+PROFILING_SLOW_MS = 500
+PROFILING_LOG_PATH = os.path.join(BASE_DIR, 'logs', 'slow_requests.jsonl')
+PROFILING_LOG_MAX_BYTES = 5 * 1024 * 1024
+PROFILING_LOG_BACKUPS = 3